@@ -4,6 +4,7 @@ import threading
 import logging
 import os
 import subprocess
+import time
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
@@ -23,7 +24,8 @@ from PySide6.QtCore import QFile, QIODevice, QObject, Signal, QRegularExpression
 from PySide6.QtGui import QRegularExpressionValidator, QIcon, QAction
 from PySide6.QtUiTools import QUiLoader
 from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QMessageBox, QFileDialog, QLineEdit, QComboBox, \
-    QProgressBar, QRadioButton, QStatusBar, QTabWidget, QDialog, QLabel, QVBoxLayout, QMenuBar, QMenu, QHBoxLayout
+    QProgressBar, QRadioButton, QStatusBar, QTabWidget, QDialog, QLabel, QVBoxLayout, QMenuBar, QMenu, QHBoxLayout, \
+    QCheckBox, QGridLayout, QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView, QPlainTextEdit
 
 from comm import *
 
@@ -64,6 +66,21 @@ class SignalStore(QObject):
     execute_state = Signal(bool)
     show_message = Signal(str, str)
     show_status = Signal(str)
+    batch_progress = Signal(str, int)
+    batch_result = Signal(str, str)
+    batch_state = Signal(bool)
+    batch_report = Signal(str)
+    dashboard_result = Signal(list, str)
+    fleet_result = Signal(object)
+    fleet_state = Signal(bool)
+    fleet_report = Signal(str)
+    soak_cycle = Signal(dict, dict)
+    soak_state = Signal(bool)
+    soak_report = Signal(str)
+    logs_progress = Signal(str, int)
+    logs_result = Signal(object)
+    logs_state = Signal(bool)
+    logs_report = Signal(str)
 
 # 全局信号实例
 signal_store = SignalStore()
@@ -81,6 +98,7 @@ class Constants:
     # 网络类型
     NETWORK_LAN = "LAN"
     NETWORK_INTERNET = "Internet"
+    NETWORK_AUTO = "Auto"
     
     # 版本类型
     EDITION_DEBUG = "Debug"
@@ -158,7 +176,7 @@ class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("设置")
-        self.setFixedSize(400, 100)
+        self.setFixedSize(400, 265)
         self._init_ui()
 
     def _init_ui(self):
@@ -189,21 +207,90 @@ class SettingsDialog(QDialog):
 
         self.radioButton_lan = QRadioButton("局域网")
         self.radioButton_internet = QRadioButton("互联网")
-        self.radioButton_internet.setEnabled(False)
+        self.radioButton_auto = QRadioButton("自动")
+        self.radioButton_auto.setToolTip("同时探测局域网和互联网服务器，使用最快的可用服务器")
         
         # 设置默认网络选择
-        if "network" in configs and configs["network"]:
-            if configs["network"] == "LAN":
-                self.radioButton_lan.setChecked(True)
-            # else:
-            #     self.radioButton_internet.setChecked(True)
+        if configs.get("network") == Constants.NETWORK_INTERNET:
+            self.radioButton_internet.setChecked(True)
+        elif configs.get("network") == Constants.NETWORK_AUTO:
+            self.radioButton_auto.setChecked(True)
         else:
             self.radioButton_lan.setChecked(True)
 
         h_layout_network.addWidget(self.radioButton_lan)
         h_layout_network.addWidget(self.radioButton_internet)
+        h_layout_network.addWidget(self.radioButton_auto)
         v_layout.addLayout(h_layout_network)
 
+        # 本地缓存配额
+        h_layout_quota = QHBoxLayout()
+        h_layout_quota.addWidget(QLabel("缓存配额(GB)："))
+        self.quota_spin = QSpinBox()
+        self.quota_spin.setRange(1, 2000)
+        self.quota_spin.setValue(configs.get("store_quota_gb") or ARTIFACT_STORE_QUOTA // 1024 ** 3)
+        h_layout_quota.addWidget(self.quota_spin)
+        v_layout.addLayout(h_layout_quota)
+
+        # 后台预取
+        h_layout_prefetch = QHBoxLayout()
+        self.prefetch_check = QCheckBox("后台预取新版本")
+        self.prefetch_check.setChecked(bool(configs.get("prefetch_enabled")))
+        h_layout_prefetch.addWidget(self.prefetch_check)
+        h_layout_prefetch.addWidget(QLabel("间隔(分钟)："))
+        self.prefetch_interval_spin = QSpinBox()
+        self.prefetch_interval_spin.setRange(1, 1440)
+        self.prefetch_interval_spin.setValue(configs.get("prefetch_interval_min") or PREFETCH_INTERVAL // 60)
+        h_layout_prefetch.addWidget(self.prefetch_interval_spin)
+        h_layout_prefetch.addWidget(QLabel("并发数："))
+        self.prefetch_workers_spin = QSpinBox()
+        self.prefetch_workers_spin.setRange(1, 4)
+        self.prefetch_workers_spin.setValue(configs.get("prefetch_workers") or PREFETCH_WORKERS)
+        h_layout_prefetch.addWidget(self.prefetch_workers_spin)
+        v_layout.addLayout(h_layout_prefetch)
+
+        # 静默时段，开始等于结束时不启用
+        h_layout_quiet = QHBoxLayout()
+        h_layout_quiet.addWidget(QLabel("预取静默时段："))
+        quiet_hours = configs.get("prefetch_quiet_hours") or [0, 0]
+        self.quiet_start_spin = QSpinBox()
+        self.quiet_start_spin.setRange(0, 23)
+        self.quiet_start_spin.setValue(quiet_hours[0])
+        h_layout_quiet.addWidget(self.quiet_start_spin)
+        h_layout_quiet.addWidget(QLabel("点 至"))
+        self.quiet_end_spin = QSpinBox()
+        self.quiet_end_spin.setRange(0, 23)
+        self.quiet_end_spin.setValue(quiet_hours[1])
+        h_layout_quiet.addWidget(self.quiet_end_spin)
+        h_layout_quiet.addWidget(QLabel("点"))
+        v_layout.addLayout(h_layout_quiet)
+
+        # 限速，0 表示不限速
+        h_layout_rate = QHBoxLayout()
+        h_layout_rate.addWidget(QLabel("全局限速(MB/s)："))
+        self.rate_limit_spin = QSpinBox()
+        self.rate_limit_spin.setRange(0, 1000)
+        self.rate_limit_spin.setValue(configs.get("rate_limit_mb") or 0)
+        h_layout_rate.addWidget(self.rate_limit_spin)
+        h_layout_rate.addWidget(QLabel("预取限速(MB/s)："))
+        self.prefetch_rate_spin = QSpinBox()
+        self.prefetch_rate_spin.setRange(0, 1000)
+        self.prefetch_rate_spin.setValue(configs.get("prefetch_rate_mb") or 0)
+        h_layout_rate.addWidget(self.prefetch_rate_spin)
+        v_layout.addLayout(h_layout_rate)
+
+        # 重启后等待设备就绪
+        h_layout_reboot = QHBoxLayout()
+        self.reboot_wait_check = QCheckBox("重启后等待设备就绪")
+        self.reboot_wait_check.setToolTip("探测设备端口，记录断开和恢复耗时")
+        self.reboot_wait_check.setChecked(bool(configs.get("reboot_wait_ready")))
+        h_layout_reboot.addWidget(self.reboot_wait_check)
+        self.reboot_login_check = QCheckBox("登录检查")
+        self.reboot_login_check.setToolTip("端口恢复后登录设备，登录成功才算就绪")
+        self.reboot_login_check.setChecked(bool(configs.get("reboot_login_check")))
+        h_layout_reboot.addWidget(self.reboot_login_check)
+        v_layout.addLayout(h_layout_reboot)
+
         # 确认取消按钮
         h_layout_button = QHBoxLayout()
         self.ok_button = QPushButton("确定")
@@ -227,9 +314,547 @@ class SettingsDialog(QDialog):
         """确认设置"""
         text = self.save_path_label.text()
         configs["save_path"] = text if text != "未设置保存路径" else None
-        configs["network"] = "LAN" if self.radioButton_lan.isChecked() else "Internet"
+        if self.radioButton_auto.isChecked():
+            configs["network"] = Constants.NETWORK_AUTO
+        elif self.radioButton_internet.isChecked():
+            configs["network"] = Constants.NETWORK_INTERNET
+        else:
+            configs["network"] = Constants.NETWORK_LAN
+        configs["store_quota_gb"] = self.quota_spin.value()
+        configs["prefetch_enabled"] = self.prefetch_check.isChecked()
+        configs["prefetch_interval_min"] = self.prefetch_interval_spin.value()
+        configs["prefetch_workers"] = self.prefetch_workers_spin.value()
+        configs["prefetch_quiet_hours"] = [self.quiet_start_spin.value(), self.quiet_end_spin.value()]
+        configs["rate_limit_mb"] = self.rate_limit_spin.value()
+        configs["prefetch_rate_mb"] = self.prefetch_rate_spin.value()
+        configs["reboot_wait_ready"] = self.reboot_wait_check.isChecked()
+        configs["reboot_login_check"] = self.reboot_login_check.isChecked()
         super().accept()
 
+class BatchDownloadDialog(QDialog):
+    """批量下载对话框，每个软件一行：勾选框、进度条、状态"""
+    def __init__(self, jobs: List[Dict[str, Any]], start_callback, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("批量下载")
+        self.setMinimumWidth(520)
+        self.jobs = jobs
+        self.start_callback = start_callback
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self._init_ui()
+
+        signal_store.batch_progress.connect(self.update_progress)
+        signal_store.batch_result.connect(self.update_result)
+        signal_store.batch_state.connect(self.update_state)
+        signal_store.batch_report.connect(self.report_label.setText)
+
+    def _init_ui(self):
+        """初始化UI"""
+        v_layout = QVBoxLayout(self)
+
+        grid = QGridLayout()
+        for row, job in enumerate(self.jobs):
+            check_box = QCheckBox(job["desc"])
+            check_box.setChecked(True)
+            progress_bar = QProgressBar()
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(0)
+            status_label = QLabel("")
+            grid.addWidget(check_box, row, 0)
+            grid.addWidget(progress_bar, row, 1)
+            grid.addWidget(status_label, row, 2)
+            self.rows[job["key"]] = {"check": check_box, "progress": progress_bar, "status": status_label}
+        v_layout.addLayout(grid)
+
+        # 各阶段耗时报告
+        self.report_label = QLabel("")
+        v_layout.addWidget(self.report_label)
+
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("下载并发数："))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 8)
+        self.workers_spin.setValue(BATCH_DOWNLOAD_WORKERS)
+        h_layout.addWidget(self.workers_spin)
+
+        h_layout.addWidget(QLabel("解压并发数："))
+        self.extract_workers_spin = QSpinBox()
+        self.extract_workers_spin.setRange(1, 8)
+        self.extract_workers_spin.setValue(BATCH_EXTRACT_WORKERS)
+        h_layout.addWidget(self.extract_workers_spin)
+
+        self.start_button = QPushButton("开始下载")
+        self.start_button.clicked.connect(self.start)
+        h_layout.addWidget(self.start_button)
+
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.close)
+        h_layout.addWidget(self.close_button)
+        v_layout.addLayout(h_layout)
+
+        self.setLayout(v_layout)
+
+    def start(self):
+        """开始批量下载"""
+        jobs = [job for job in self.jobs if self.rows[job["key"]]["check"].isChecked()]
+        if not jobs:
+            QMessageBox.warning(self, "提示", "请选择需要下载的软件")
+            return
+        for job in jobs:
+            self.rows[job["key"]]["progress"].setValue(0)
+            self.rows[job["key"]]["status"].setText("等待中")
+        self.report_label.setText("")
+        self.start_callback(jobs, self.workers_spin.value(), self.extract_workers_spin.value())
+
+    def update_progress(self, key: str, percent: int):
+        """更新单个软件的下载进度"""
+        if key in self.rows:
+            self.rows[key]["progress"].setValue(percent)
+
+    def update_result(self, key: str, message: str):
+        """显示单个软件的下载结果"""
+        if key in self.rows:
+            self.rows[key]["status"].setText(message)
+
+    def update_state(self, running: bool):
+        """下载过程中禁用勾选和开始按钮"""
+        self.start_button.setEnabled(not running)
+        self.workers_spin.setEnabled(not running)
+        self.extract_workers_spin.setEnabled(not running)
+        for row in self.rows.values():
+            row["check"].setEnabled(not running)
+
+    def closeEvent(self, event):
+        """关闭事件处理"""
+        signal_store.batch_progress.disconnect(self.update_progress)
+        signal_store.batch_result.disconnect(self.update_result)
+        signal_store.batch_state.disconnect(self.update_state)
+        signal_store.batch_report.disconnect(self.report_label.setText)
+        event.accept()
+
+class DashboardDialog(QDialog):
+    """最新版本总览对话框，并发查询所有软件类型的最新构建"""
+    HEADERS = ["软件", "型号", "最新文件", "构建日期", "大小"]
+
+    def __init__(self, refresh_callback, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("最新版本总览")
+        self.resize(760, 400)
+        self.refresh_callback = refresh_callback
+        self._init_ui()
+
+        signal_store.dashboard_result.connect(self.update_builds)
+
+    def _init_ui(self):
+        """初始化UI"""
+        v_layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        v_layout.addWidget(self.table)
+
+        h_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        h_layout.addWidget(self.status_label)
+
+        self.refresh_button = QPushButton("刷新")
+        self.refresh_button.clicked.connect(self.refresh)
+        h_layout.addWidget(self.refresh_button)
+
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.close)
+        h_layout.addWidget(self.close_button)
+        v_layout.addLayout(h_layout)
+
+        self.setLayout(v_layout)
+
+    def refresh(self):
+        """重新查询"""
+        self.refresh_button.setEnabled(False)
+        self.status_label.setText("正在查询...")
+        self.refresh_callback()
+
+    def update_builds(self, builds: List[Dict[str, Any]], status: str):
+        """显示查询结果"""
+        self.table.setRowCount(len(builds))
+        for row, build in enumerate(builds):
+            if build["error"] is not None:
+                filename = f"查询失败: {build['error']}"
+            else:
+                filename = build["filename"] or "未找到"
+            values = [build["soft_type"], build["model"] or "", filename, build["build_date"] or "", build["size"] or ""]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(str(value)))
+        self.table.resizeColumnsToContents()
+        self.status_label.setText(status)
+        self.refresh_button.setEnabled(True)
+
+    def closeEvent(self, event):
+        """关闭事件处理"""
+        signal_store.dashboard_result.disconnect(self.update_builds)
+        event.accept()
+
+class DeviceListDialog(QDialog):
+    """多设备操作对话框的基类，提供设备列表输入和默认型号"""
+    MODELS = DEVICE_MODELS
+
+    def _init_targets(self, v_layout: QVBoxLayout, placeholder: str) -> QHBoxLayout:
+        """添加设备列表输入框和默认型号下拉框，返回型号所在的行供子类添加其他选项"""
+        v_layout.addWidget(QLabel("设备列表（每行IP、CIDR或范围，可在行末写型号）："))
+        self.targets_edit = QPlainTextEdit()
+        self.targets_edit.setPlaceholderText(placeholder)
+        self.targets_edit.setMaximumHeight(100)
+        v_layout.addWidget(self.targets_edit)
+
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("默认型号："))
+        self.model_combo = QComboBox()
+        self.model_combo.addItems(self.MODELS)
+        h_layout.addWidget(self.model_combo)
+        return h_layout
+
+    def _parse_targets(self) -> List[tuple]:
+        """解析设备列表，格式错误或为空时提示并返回空列表"""
+        try:
+            targets = parse_fleet_targets(self.targets_edit.toPlainText(), self.model_combo.currentText(), self.MODELS)
+        except ValueError as e:
+            QMessageBox.warning(self, "提示", str(e))
+            return []
+        if not targets:
+            QMessageBox.warning(self, "提示", "请输入设备IP")
+        return targets
+
+class FleetDialog(DeviceListDialog):
+    """批量重启对话框，输入设备列表后并发重启，每台设备的结果完成后立即显示"""
+    HEADERS = ["IP", "型号", "结果", "耗时", "断开", "恢复", "信息"]
+    STATUS_TEXT = {FLEET_OK: "成功", FLEET_AUTH_FAILED: "认证失败", FLEET_TIMEOUT: "超时", FLEET_ERROR: "失败"}
+
+    def __init__(self, start_callback, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("批量重启")
+        self.resize(640, 480)
+        self.start_callback = start_callback
+        self.rows: Dict[str, int] = {}
+        self._init_ui()
+
+        signal_store.fleet_result.connect(self.update_result)
+        signal_store.fleet_state.connect(self.update_state)
+        signal_store.fleet_report.connect(self.status_label.setText)
+
+    def _init_ui(self):
+        """初始化UI"""
+        v_layout = QVBoxLayout(self)
+
+        h_layout = self._init_targets(v_layout, "192.168.1.10-20 PRO\n192.168.2.0/28, 192.168.3.5 TURBO")
+
+        h_layout.addWidget(QLabel("并发数："))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 64)
+        self.workers_spin.setValue(FLEET_WORKERS)
+        h_layout.addWidget(self.workers_spin)
+
+        self.wait_ready_check = QCheckBox("等待就绪")
+        self.wait_ready_check.setToolTip("重启后探测设备端口，记录断开和恢复耗时")
+        self.wait_ready_check.setChecked(bool(configs.get("reboot_wait_ready")))
+        h_layout.addWidget(self.wait_ready_check)
+        self.login_check = QCheckBox("登录检查")
+        self.login_check.setChecked(bool(configs.get("reboot_login_check")))
+        h_layout.addWidget(self.login_check)
+        h_layout.addStretch()
+        v_layout.addLayout(h_layout)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.Stretch)
+        v_layout.addWidget(self.table)
+
+        h_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        h_layout.addWidget(self.status_label)
+
+        self.start_button = QPushButton("开始重启")
+        self.start_button.clicked.connect(self.start)
+        h_layout.addWidget(self.start_button)
+
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.close)
+        h_layout.addWidget(self.close_button)
+        v_layout.addLayout(h_layout)
+
+        self.setLayout(v_layout)
+
+    def start(self):
+        """解析设备列表并开始批量重启"""
+        targets = self._parse_targets()
+        if not targets:
+            return
+
+        self.rows = {}
+        self.table.setRowCount(len(targets))
+        for row, (ip, model) in enumerate(targets):
+            self.rows[ip] = row
+            for column, value in enumerate([ip, model, "等待中", "", "", "", ""]):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.status_label.setText(f"共 {len(targets)} 台设备")
+        self.start_callback(targets, self.workers_spin.value(), self.wait_ready_check.isChecked(),
+                            self.login_check.isChecked())
+
+    def update_result(self, result: FleetResult):
+        """显示单台设备的结果"""
+        row = self.rows.get(result.ip)
+        if row is None:
+            return
+        timing = result.timing
+        down = f"{timing.down:.1f}s" if timing and timing.down is not None else ""
+        up = f"{timing.up:.1f}s" if timing and timing.up is not None else ""
+        values = [self.STATUS_TEXT.get(result.status, result.status), f"{result.elapsed:.2f}s", down, up,
+                  result.message]
+        for column, value in enumerate(values, 2):
+            self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def update_state(self, running: bool):
+        """执行过程中禁用输入和开始按钮"""
+        self.start_button.setEnabled(not running)
+        self.targets_edit.setReadOnly(running)
+        self.model_combo.setEnabled(not running)
+        self.workers_spin.setEnabled(not running)
+        self.wait_ready_check.setEnabled(not running)
+        self.login_check.setEnabled(not running)
+
+    def closeEvent(self, event):
+        """关闭事件处理"""
+        signal_store.fleet_result.disconnect(self.update_result)
+        signal_store.fleet_state.disconnect(self.update_state)
+        signal_store.fleet_report.disconnect(self.status_label.setText)
+        event.accept()
+
+class SoakTestDialog(DeviceListDialog):
+    """重启稳定性测试对话框，对多台设备重复重启，每台设备一行显示进度和就绪耗时统计"""
+    HEADERS = ["IP", "型号", "进度", "失败", "P50", "P90", "最大", "异常", "内存"]
+
+    def __init__(self, start_callback, stop_callback, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("重启稳定性测试")
+        self.resize(720, 480)
+        self.start_callback = start_callback
+        self.stop_callback = stop_callback
+        self.rows: Dict[str, int] = {}
+        self._init_ui()
+
+        signal_store.soak_cycle.connect(self.update_cycle)
+        signal_store.soak_state.connect(self.update_state)
+        signal_store.soak_report.connect(self.status_label.setText)
+
+    def _init_ui(self):
+        """初始化UI"""
+        v_layout = QVBoxLayout(self)
+
+        h_layout = self._init_targets(v_layout, "192.168.1.211 PRO\n192.168.1.212 TURBO")
+
+        h_layout.addWidget(QLabel("重启次数："))
+        self.cycles_spin = QSpinBox()
+        self.cycles_spin.setRange(1, 100000)
+        self.cycles_spin.setValue(SOAK_CYCLES)
+        h_layout.addWidget(self.cycles_spin)
+
+        h_layout.addWidget(QLabel("间隔(秒)："))
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(0, 3600)
+        self.interval_spin.setValue(SOAK_INTERVAL)
+        h_layout.addWidget(self.interval_spin)
+
+        self.login_check = QCheckBox("登录检查")
+        self.login_check.setChecked(True)
+        h_layout.addWidget(self.login_check)
+        h_layout.addStretch()
+        v_layout.addLayout(h_layout)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(7, QHeaderView.Stretch)
+        v_layout.addWidget(self.table)
+
+        h_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        self.status_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        h_layout.addWidget(self.status_label)
+
+        self.start_button = QPushButton("开始测试")
+        self.start_button.clicked.connect(self.start)
+        h_layout.addWidget(self.start_button)
+
+        self.stop_button = QPushButton("停止")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop)
+        h_layout.addWidget(self.stop_button)
+
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.close)
+        h_layout.addWidget(self.close_button)
+        v_layout.addLayout(h_layout)
+
+        self.setLayout(v_layout)
+
+    def start(self):
+        """解析设备列表并开始测试"""
+        targets = self._parse_targets()
+        if not targets:
+            return
+
+        cycles = self.cycles_spin.value()
+        self.rows = {}
+        self.table.setRowCount(len(targets))
+        for row, (ip, model) in enumerate(targets):
+            self.rows[ip] = row
+            for column, value in enumerate([ip, model, f"0/{cycles}"] + [""] * (len(self.HEADERS) - 3)):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.start_callback(targets, cycles, self.interval_spin.value(), self.login_check.isChecked())
+
+    def stop(self):
+        """停止测试"""
+        self.stop_button.setEnabled(False)
+        self.status_label.setText("正在停止，等待进行中的重启完成...")
+        self.stop_callback()
+
+    def update_cycle(self, cycle: Dict[str, Any], stats: Dict[str, Any]):
+        """显示单台设备的进度和统计"""
+        row = self.rows.get(cycle["ip"])
+        if row is None:
+            return
+
+        def seconds(value):
+            return f"{value:.1f}s" if value is not None else ""
+
+        values = [f"{stats['cycles']}/{self.cycles_spin.value()}", str(stats["failures"]), seconds(stats["p50"]),
+                  seconds(stats["p90"]), seconds(stats["max"]), ",".join(map(str, stats["outliers"])),
+                  cycle["used_memory"] or ""]
+        for column, value in enumerate(values, 2):
+            self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def update_state(self, running: bool):
+        """测试过程中禁用输入"""
+        self.start_button.setEnabled(not running)
+        self.stop_button.setEnabled(running)
+        self.targets_edit.setReadOnly(running)
+        for widget in (self.model_combo, self.cycles_spin, self.interval_spin, self.login_check):
+            widget.setEnabled(not running)
+
+    def closeEvent(self, event):
+        """关闭事件处理，测试在后台继续进行"""
+        signal_store.soak_cycle.disconnect(self.update_cycle)
+        signal_store.soak_state.disconnect(self.update_state)
+        signal_store.soak_report.disconnect(self.status_label.setText)
+        event.accept()
+
+class LogCollectDialog(DeviceListDialog):
+    """批量获取日志对话框，同时从多台设备获取日志，每台设备一行显示进度和结果"""
+    HEADERS = ["IP", "型号", "状态", "已传输", "文件数", "耗时", "压缩包"]
+    STATUS_TEXT = FleetDialog.STATUS_TEXT
+    MODELS = list(LOG_MODELS)
+
+    def __init__(self, start_callback, open_callback, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("批量获取日志")
+        self.resize(720, 480)
+        self.start_callback = start_callback
+        self.open_callback = open_callback
+        self.rows: Dict[str, int] = {}
+        self._init_ui()
+
+        signal_store.logs_progress.connect(self.update_progress)
+        signal_store.logs_result.connect(self.update_result)
+        signal_store.logs_state.connect(self.update_state)
+        signal_store.logs_report.connect(self.status_label.setText)
+
+    def _init_ui(self):
+        """初始化UI"""
+        v_layout = QVBoxLayout(self)
+
+        h_layout = self._init_targets(v_layout, "192.168.1.10-20 PRO\n192.168.1.30 TURBO")
+        h_layout.addWidget(QLabel("并发数："))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 32)
+        self.workers_spin.setValue(LOG_COLLECT_WORKERS)
+        h_layout.addWidget(self.workers_spin)
+        h_layout.addStretch()
+        v_layout.addLayout(h_layout)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.Stretch)
+        v_layout.addWidget(self.table)
+
+        h_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        h_layout.addWidget(self.status_label)
+
+        self.start_button = QPushButton("开始获取")
+        self.start_button.clicked.connect(self.start)
+        h_layout.addWidget(self.start_button)
+
+        self.open_button = QPushButton("打开文件夹")
+        self.open_button.clicked.connect(self.open_callback)
+        h_layout.addWidget(self.open_button)
+
+        self.close_button = QPushButton("关闭")
+        self.close_button.clicked.connect(self.close)
+        h_layout.addWidget(self.close_button)
+        v_layout.addLayout(h_layout)
+
+        self.setLayout(v_layout)
+
+    def start(self):
+        """解析设备列表并开始获取"""
+        targets = self._parse_targets()
+        if not targets:
+            return
+
+        self.rows = {}
+        self.table.setRowCount(len(targets))
+        for row, (ip, model) in enumerate(targets):
+            self.rows[ip] = row
+            for column, value in enumerate([ip, model, "等待中"] + [""] * (len(self.HEADERS) - 3)):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.status_label.setText(f"共 {len(targets)} 台设备")
+        self.start_callback(targets, self.workers_spin.value())
+
+    def update_progress(self, ip: str, transferred: int):
+        """显示单台设备已传输的数据量"""
+        row = self.rows.get(ip)
+        if row is not None:
+            self.table.setItem(row, 2, QTableWidgetItem("获取中"))
+            self.table.setItem(row, 3, QTableWidgetItem(f"{transferred / 1024 ** 2:.2f} MB"))
+
+    def update_result(self, result: LogResult):
+        """显示单台设备的结果"""
+        row = self.rows.get(result.ip)
+        if row is None:
+            return
+        values = [self.STATUS_TEXT.get(result.status, result.status), f"{result.transferred / 1024 ** 2:.2f} MB",
+                  str(result.files), f"{result.elapsed:.2f}s",
+                  os.path.basename(result.archive) if result.archive else result.message]
+        for column, value in enumerate(values, 2):
+            self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def update_state(self, running: bool):
+        """获取过程中禁用输入和开始按钮"""
+        self.start_button.setEnabled(not running)
+        self.targets_edit.setReadOnly(running)
+        self.model_combo.setEnabled(not running)
+        self.workers_spin.setEnabled(not running)
+
+    def closeEvent(self, event):
+        """关闭事件处理"""
+        signal_store.logs_progress.disconnect(self.update_progress)
+        signal_store.logs_result.disconnect(self.update_result)
+        signal_store.logs_state.disconnect(self.update_state)
+        signal_store.logs_report.disconnect(self.status_label.setText)
+        event.accept()
+
 class TabInitializer:
     """Tab初始化器，用于减少重复代码"""
     
@@ -313,6 +938,8 @@ class MainWindow(QMainWindow):
         self._init_tabs()
         self._init_menu()
         self._load_config()
+        self._apply_transfer_settings()
+        self._apply_prefetch_settings()
         self._check_version()
 
     def _init_signals(self):
@@ -331,6 +958,13 @@ class MainWindow(QMainWindow):
         self.downloading: bool = False
         self.executing: bool = False
         self.memory_monitor_dialog: Optional[MemoryMonitorDialog] = None
+        self.batch_download_dialog: Optional[BatchDownloadDialog] = None
+        self.dashboard_dialog: Optional[DashboardDialog] = None
+        self.fleet_dialog: Optional[FleetDialog] = None
+        self.soak_dialog: Optional[SoakTestDialog] = None
+        self.soak_test: Optional[SoakTest] = None
+        self.log_collect_dialog: Optional[LogCollectDialog] = None
+        self.prefetch_scheduler: Optional[PrefetchScheduler] = None
 
     def _init_ui(self):
         """初始化UI"""
@@ -385,6 +1019,16 @@ class MainWindow(QMainWindow):
         self.tool_menu = self.window.findChild(QMenu, "tool")
         self.memory_action = self.window.findChild(QAction, "action_memory")
         self.memory_action.triggered.connect(self.open_memory_monitor)
+        self.batch_download_action = self.window.findChild(QAction, "action_batch_download")
+        self.batch_download_action.triggered.connect(self.open_batch_download)
+        self.dashboard_action = self.window.findChild(QAction, "action_dashboard")
+        self.dashboard_action.triggered.connect(self.open_dashboard)
+        self.fleet_action = self.window.findChild(QAction, "action_fleet")
+        self.fleet_action.triggered.connect(self.open_fleet)
+        self.soak_action = self.window.findChild(QAction, "action_soak")
+        self.soak_action.triggered.connect(self.open_soak_test)
+        self.collect_logs_action = self.window.findChild(QAction, "action_collect_logs")
+        self.collect_logs_action.triggered.connect(self.open_log_collect)
         
         # 帮助菜单
         self.help_menu = self.window.findChild(QMenu, "help")
@@ -689,6 +1333,8 @@ class MainWindow(QMainWindow):
         if settings_dialog.exec():
             self.filePath = configs.get("save_path")
             self.network = configs.get("network")
+            self._apply_transfer_settings()
+            self._apply_prefetch_settings()
 
     def show_version(self):
         """显示版本信息对话框"""
@@ -765,6 +1411,16 @@ class MainWindow(QMainWindow):
                 ip_address = ".".join(ip_part.text() for ip_part in ip_parts)
 
                 if command == Constants.COMMAND_REBOOT:
+                    if configs.get("reboot_wait_ready"):
+                        signal_store.show_status.emit("正在重启，等待设备就绪")
+                        timing = reboot_and_wait(model, ip_address, login_check=bool(configs.get("reboot_login_check")))
+                        self.executing = False
+                        signal_store.execute_state.emit(self.executing)
+                        if timing is False:
+                            signal_store.show_status.emit("命令执行失败")
+                        else:
+                            signal_store.show_status.emit(f"设备{'已就绪' if timing else '未就绪'}：{timing}")
+                        return
                     if not reboot_device(device_model=model, ip=ip_address):
                         self.executing = False
                         signal_store.execute_state.emit(self.executing)
@@ -994,32 +1650,29 @@ class MainWindow(QMainWindow):
                         continue
 
                     name = infos["name"]
-                    file_path = os.path.join(self.filePath, name)
-                    
-                    # 下载文件
+                    store = self._get_artifact_store()
+
+                    # 下载文件，仓库中已有时直接使用
                     try:
-                        download_file(
-                            file_name=name, 
-                            file_save_path=self.filePath, 
+                        digest, cached = fetch_artifact(
+                            store,
+                            name,
                             soft_type=soft_type,
                             edition=edition,
-                            network=self.network
+                            network=self.network,
+                            progress_callback=self._make_download_progress(name)
                         )
-                        signal_store.show_status.emit(f"{name}:文件下载成功")
-                    except FileExistsError:
-                        signal_store.show_message.emit(f"{name}:文件已经存在！", "information")
-                        signal_store.show_status.emit(f"{name}:文件已经存在！")
+                        signal_store.show_status.emit(f"{name}:已在本地缓存中" if cached else f"{name}:文件下载成功")
                     except Exception as e:
                         logger.error(f"下载文件时出错: {e}")
                         raise e
-                    
+
                     # 解压文件（无论是否已下载）
                     try:
-                        unzip_file(self.filePath, name)
-                        signal_store.show_status.emit(f"{name}:文件解压成功")
-                    except FileExistsError:
-                        signal_store.show_message.emit(f"{name}:文件已经解压！", "information")
-                        signal_store.show_status.emit(f"{name}:文件已经解压！")
+                        if store.extract(digest, os.path.join(self.filePath, name[:-4])):
+                            signal_store.show_status.emit(f"{name}:文件解压成功")
+                        else:
+                            signal_store.show_status.emit(f"{name}:文件已经解压！")
                     except Exception as e:
                         logger.error(f"解压文件时出错: {e}")
                         # 解压失败不影响下载完成状态
@@ -1054,6 +1707,300 @@ class MainWindow(QMainWindow):
         worker = threading.Thread(target=worker_thread_func)
         worker.start()
 
+    def _get_artifact_store(self) -> ArtifactStore:
+        """当前保存路径对应的本地构建产物仓库"""
+        quota_gb = configs.get("store_quota_gb") or ARTIFACT_STORE_QUOTA // 1024 ** 3
+        return get_artifact_store(self.filePath, quota_gb * 1024 ** 3)
+
+    @staticmethod
+    def _make_download_progress(name: str):
+        """生成下载进度回调，按百分比变化刷新状态栏"""
+        last_percent = [-1]
+
+        def on_progress(done: int, total: Optional[int]):
+            if total:
+                percent = done * 100 // total
+                if percent == last_percent[0]:
+                    return
+                last_percent[0] = percent
+                signal_store.show_status.emit(
+                    f"{name}:正在下载 {percent}% ({done / 1024 ** 2:.1f}/{total / 1024 ** 2:.1f} MB)")
+            elif done // (10 * 1024 ** 2) != last_percent[0]:
+                last_percent[0] = done // (10 * 1024 ** 2)
+                signal_store.show_status.emit(f"{name}:正在下载 {done / 1024 ** 2:.1f} MB")
+
+        return on_progress
+
+    @staticmethod
+    def _apply_transfer_settings():
+        """按配置设置全局限速"""
+        transfer_scheduler.set_rate_limit((configs.get("rate_limit_mb") or 0) * 1024 ** 2)
+
+    def _apply_prefetch_settings(self):
+        """按配置启动、重启或停止后台预取"""
+        if self.prefetch_scheduler:
+            self.prefetch_scheduler.stop()
+            self.prefetch_scheduler = None
+        if not configs.get("prefetch_enabled") or not self.filePath:
+            return
+
+        def jobs_provider() -> List[Dict[str, Any]]:
+            # Release 未选择版本的软件不预取
+            return [job for job in self._collect_batch_jobs()
+                    if not (job["edition"] == "Release" and job["ver"] == " ")]
+
+        quiet_hours = configs.get("prefetch_quiet_hours") or [0, 0]
+        self.prefetch_scheduler = PrefetchScheduler(
+            self._get_artifact_store(),
+            self.filePath,
+            jobs_provider,
+            network=self.network or Constants.DEFAULT_NETWORK,
+            interval=(configs.get("prefetch_interval_min") or PREFETCH_INTERVAL // 60) * 60,
+            workers=configs.get("prefetch_workers") or PREFETCH_WORKERS,
+            quiet_hours=tuple(quiet_hours),
+            is_busy=lambda: self.downloading,
+            status_callback=signal_store.show_status.emit,
+            rate_limit=(configs.get("prefetch_rate_mb") or 0) * 1024 ** 2
+        )
+        self.prefetch_scheduler.start()
+        logger.info("后台预取已启动")
+
+    def _collect_batch_jobs(self) -> List[Dict[str, Any]]:
+        """根据各标签页当前的选择生成批量下载任务"""
+        jobs = []
+        for tab_name in ["ics", "icc", "icm", "icf", "vp", "icp"]:
+            edition_combo = getattr(self, f"{tab_name}_comboBox_Edition", None)
+            ver_combo = getattr(self, f"{tab_name}_comboBox_ver", None)
+            model_combo = getattr(self, f"{tab_name}_comboBox_model_1", None) if tab_name in ["icc", "icf"] else None
+            if not edition_combo or not ver_combo:
+                continue
+
+            edition = edition_combo.currentText()
+            ver = ver_combo.currentText()
+            model = model_combo.currentText() if model_combo else None
+            desc = " ".join(part for part in [tab_name.upper(), model, edition, ver] if part and part.strip())
+            jobs.append({
+                "key": tab_name.upper(),
+                "soft_type": tab_name.upper(),
+                "edition": edition,
+                "model": model,
+                "ver": ver,
+                "desc": desc,
+            })
+        return jobs
+
+    def open_batch_download(self):
+        """打开批量下载对话框"""
+        if self.batch_download_dialog and self.batch_download_dialog.isVisible():
+            self.batch_download_dialog.activateWindow()
+            return
+        self.batch_download_dialog = BatchDownloadDialog(self._collect_batch_jobs(), self.start_batch_download, self)
+        self.batch_download_dialog.show()
+
+    def start_batch_download(self, jobs: List[Dict[str, Any]], workers: int, extract_workers: int):
+        """在后台线程中并发下载多个软件，下载完成的文件由独立的解压线程处理"""
+        stage_names = {"resolve": "查找版本", "download": "下载中", "wait": "等待解压", "extract": "解压中"}
+
+        def on_stage(key: str, stage: str):
+            signal_store.batch_result.emit(key, stage_names.get(stage, stage))
+
+        def on_stats(pipeline: DownloadPipeline):
+            signal_store.batch_report.emit(pipeline.report())
+
+        def on_progress(key: str, done: int, total: Optional[int]):
+            if total:
+                signal_store.batch_progress.emit(key, done * 100 // total)
+
+        def on_result(key: str, result: Dict[str, Any]):
+            if result["error"] is None:
+                self.filename[key] = {"name": result["name"], "is_checked": True}
+                signal_store.batch_progress.emit(key, 100)
+                signal_store.batch_result.emit(key, f"完成 {result['elapsed']:.1f}s")
+            elif isinstance(result["error"], requests.exceptions.ConnectionError):
+                signal_store.batch_result.emit(key, "网络错误")
+            else:
+                signal_store.batch_result.emit(key, f"失败: {result['error']}")
+
+        def worker_thread_func():
+            try:
+                results = batch_download(jobs, self.filePath, self.network, workers,
+                                         progress_callback=on_progress, result_callback=on_result,
+                                         extract_workers=extract_workers, stage_callback=on_stage,
+                                         stats_callback=on_stats, store=self._get_artifact_store())
+                failed = [key for key, result in results.items() if result["error"] is not None]
+                configs["filename"] = self.filename
+                signal_store.show_status.emit(f"批量下载完成，失败：{', '.join(failed)}" if failed else "批量下载完成")
+            except Exception as e:
+                logger.error(f"批量下载时出错: {e}")
+                signal_store.show_status.emit("批量下载失败")
+            finally:
+                self.downloading = False
+                signal_store.batch_state.emit(False)
+
+        if self.downloading:
+            QMessageBox.warning(self.window, '警告', '任务进行中，请等待完成')
+            return
+        if not self.filePath:
+            QMessageBox.warning(self.window, '警告', '请设置文件保存地址')
+            return
+        invalid = [job["key"] for job in jobs if job["edition"] == "Release" and job["ver"] == " "]
+        if invalid:
+            QMessageBox.warning(self.window, '警告', f"请设置Release版本：{', '.join(invalid)}")
+            return
+
+        self.downloading = True
+        signal_store.batch_state.emit(True)
+        signal_store.show_status.emit("正在批量下载")
+        worker = threading.Thread(target=worker_thread_func)
+        worker.start()
+
+    def open_dashboard(self):
+        """打开最新版本总览对话框并开始查询"""
+        if self.dashboard_dialog and self.dashboard_dialog.isVisible():
+            self.dashboard_dialog.activateWindow()
+            return
+        self.dashboard_dialog = DashboardDialog(self.refresh_dashboard, self)
+        self.dashboard_dialog.show()
+        self.dashboard_dialog.refresh()
+
+    def refresh_dashboard(self):
+        """在后台线程中并发查询所有软件类型的最新版本"""
+        def worker_thread_func():
+            begin = time.perf_counter()
+            try:
+                builds = get_latest_builds(network=self.network or Constants.DEFAULT_NETWORK)
+                signal_store.dashboard_result.emit(builds, f"查询完成，耗时 {time.perf_counter() - begin:.2f}s")
+            except requests.exceptions.ConnectionError:
+                signal_store.dashboard_result.emit([], "网络错误，查询失败！")
+            except Exception as e:
+                logger.error(f"查询最新版本时出错: {e}")
+                signal_store.dashboard_result.emit([], f"查询失败: {e}")
+
+        worker = threading.Thread(target=worker_thread_func, daemon=True)
+        worker.start()
+
+    def open_fleet(self):
+        """打开批量重启对话框"""
+        if self.fleet_dialog and self.fleet_dialog.isVisible():
+            self.fleet_dialog.activateWindow()
+            return
+        self.fleet_dialog = FleetDialog(self.run_fleet_reboot, self)
+        self.fleet_dialog.show()
+
+    def run_fleet_reboot(self, targets: List[tuple], workers: int, wait_ready: bool = False, login_check: bool = False):
+        """在后台线程中并发重启多台设备，不占用单设备命令的执行状态"""
+        def reboot_and_wait_action(device_model, ip, raise_errors=False):
+            return reboot_and_wait(device_model, ip, raise_errors=raise_errors, login_check=login_check)
+
+        def worker_thread_func():
+            signal_store.fleet_state.emit(True)
+            begin = time.perf_counter()
+            action = reboot_and_wait_action if wait_ready else reboot_device
+            try:
+                results = run_fleet(targets, action=action, workers=workers,
+                                    result_callback=signal_store.fleet_result.emit)
+                counts = {status: sum(result.status == status for result in results)
+                          for status in FleetDialog.STATUS_TEXT}
+                summary = "，".join(f"{FleetDialog.STATUS_TEXT[status]} {count}"
+                                   for status, count in counts.items() if count)
+                signal_store.fleet_report.emit(f"完成 {len(results)} 台，{summary}，耗时 {time.perf_counter() - begin:.2f}s")
+            except Exception as e:
+                logger.error(f"批量重启时出错: {e}")
+                signal_store.fleet_report.emit(f"批量重启失败: {e}")
+            finally:
+                signal_store.fleet_state.emit(False)
+
+        worker = threading.Thread(target=worker_thread_func, daemon=True)
+        worker.start()
+
+    def open_soak_test(self):
+        """打开重启稳定性测试对话框"""
+        if self.soak_dialog and self.soak_dialog.isVisible():
+            self.soak_dialog.activateWindow()
+            return
+        self.soak_dialog = SoakTestDialog(self.run_soak_test, self.stop_soak_test, self)
+        self.soak_dialog.show()
+        if self.soak_test:
+            signal_store.soak_state.emit(True)
+            signal_store.soak_report.emit("测试进行中，重新打开后从下一次重启开始显示")
+
+    def run_soak_test(self, targets: List[tuple], cycles: int, interval: int, login_check: bool):
+        """在后台线程中运行重启稳定性测试，结果文件保存在保存路径的 soak 目录下"""
+        if not self.filePath:
+            QMessageBox.warning(self.window, '警告', '请设置保存地址')
+            return
+        if self.soak_test:
+            QMessageBox.warning(self.window, '警告', '测试进行中，请等待完成')
+            return
+
+        self.soak_test = SoakTest(targets, self.filePath, cycles, interval, login_check,
+                                  cycle_callback=signal_store.soak_cycle.emit)
+
+        def worker_thread_func():
+            signal_store.soak_state.emit(True)
+            signal_store.soak_report.emit(f"测试进行中，结果文件: {self.soak_test.result_file}")
+            try:
+                summary = self.soak_test.run()
+                failures = sum(stats["failures"] for stats in summary.values())
+                signal_store.soak_report.emit(f"测试结束，失败 {failures} 次，结果文件: {self.soak_test.result_file}")
+            except Exception as e:
+                logger.error(f"重启稳定性测试出错: {e}")
+                signal_store.soak_report.emit(f"测试出错: {e}")
+            finally:
+                self.soak_test = None
+                signal_store.soak_state.emit(False)
+
+        worker = threading.Thread(target=worker_thread_func, daemon=True)
+        worker.start()
+
+    def stop_soak_test(self):
+        """停止重启稳定性测试"""
+        if self.soak_test:
+            self.soak_test.stop()
+
+    def open_log_collect(self):
+        """打开批量获取日志对话框"""
+        if self.log_collect_dialog and self.log_collect_dialog.isVisible():
+            self.log_collect_dialog.activateWindow()
+            return
+        self.log_collect_dialog = LogCollectDialog(self.run_log_collect, self.open_logs_folder, self)
+        self.log_collect_dialog.show()
+
+    def open_logs_folder(self):
+        """打开日志文件夹"""
+        if not self.filePath:
+            QMessageBox.warning(self.window, '警告', '请设置保存地址')
+            return
+        normalized_path = os.path.normpath(f"{self.filePath}/logs")
+        os.makedirs(normalized_path, exist_ok=True)
+        os.startfile(normalized_path)
+
+    def run_log_collect(self, targets: List[tuple], workers: int):
+        """在后台线程中同时获取多台设备的日志，不占用单设备命令的执行状态"""
+        if not self.filePath:
+            QMessageBox.warning(self.window, '警告', '请设置保存地址')
+            return
+
+        def worker_thread_func():
+            signal_store.logs_state.emit(True)
+            begin = time.perf_counter()
+            try:
+                manifest_path, results = collect_device_logs(
+                    targets, self.filePath, workers, progress_callback=signal_store.logs_progress.emit,
+                    result_callback=signal_store.logs_result.emit)
+                failures = sum(result.status != FLEET_OK for result in results)
+                manifest_name = os.path.basename(manifest_path)
+                signal_store.logs_report.emit(f"完成 {len(results)} 台，失败 {failures} 台，"
+                                              f"耗时 {time.perf_counter() - begin:.2f}s，清单: {manifest_name}")
+            except Exception as e:
+                logger.error(f"批量获取日志时出错: {e}")
+                signal_store.logs_report.emit(f"批量获取日志失败: {e}")
+            finally:
+                signal_store.logs_state.emit(False)
+
+        worker = threading.Thread(target=worker_thread_func, daemon=True)
+        worker.start()
+
     def run_soft(self):
         """运行软件"""
         try:
@@ -1194,6 +2141,11 @@ class MainWindow(QMainWindow):
                 self.network = config_data.get('network', '')
                 configs["network"] = self.network
 
+                configs["store_quota_gb"] = config_data.get('store_quota_gb')
+                for key in ("prefetch_enabled", "prefetch_interval_min", "prefetch_workers", "prefetch_quiet_hours",
+                            "rate_limit_mb", "prefetch_rate_mb", "reboot_wait_ready", "reboot_login_check"):
+                    configs[key] = config_data.get(key)
+
                 # 正确处理 filename 数据
                 filename_data = config_data.get('filename', {})
                 configs["filename"] = filename_data
@@ -1214,6 +2166,11 @@ class MainWindow(QMainWindow):
         """窗口关闭事件"""
         if self.memory_monitor_dialog:
             self.memory_monitor_dialog.close()
+        if self.prefetch_scheduler:
+            self.prefetch_scheduler.stop()
+        self.stop_soak_test()
+        ssh_pool.close_all()
+        telnet_pool.close_all()
         self.save_config()
         event.accept()
 
@@ -0,0 +1,286 @@
+"""
+性能基准测试
+用法:
+    python benchmark.py download [--size-mb 64] [--rate-mb 8] [--connections 1 2 4 8]
+    python benchmark.py parse [--rows 10000] [--repeat 5]
+    python benchmark.py unzip [--files 4000] [--workers 1 2 4 8] [--processes]
+    python benchmark.py incremental [--files 4000] [--changed 5]
+"""
+import argparse
+import hashlib
+import http.server
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+import comm
+
+
+class ThrottledRangeHandler(http.server.BaseHTTPRequestHandler):
+    """
+    模拟文件服务器：支持 HEAD、Range 请求，且每个连接限速，模拟单条TCP流的带宽瓶颈
+    """
+    protocol_version = "HTTP/1.1"  # keep-alive，与真实服务器一致
+    payload = b""
+    rate = 8 * 1024 * 1024  # 单连接每秒字节数
+    accept_ranges = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _range(self):
+        total = len(self.payload)
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if not match or not self.accept_ranges:
+            return 0, total - 1, False
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else total - 1
+        return start, min(end, total - 1), True
+
+    def _send_headers(self):
+        start, end, partial = self._range()
+        self.send_response(206 if partial else 200)
+        self.send_header("Content-Length", str(end - start + 1))
+        if self.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if partial:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(self.payload)}")
+        self.end_headers()
+        return start, end
+
+    def do_HEAD(self):
+        self._send_headers()
+
+    def do_GET(self):
+        start, end = self._send_headers()
+        block = 64 * 1024
+        begin = time.perf_counter()
+        sent = 0
+        while start + sent <= end:
+            data = self.payload[start + sent:min(start + sent + block, end + 1)]
+            self.wfile.write(data)
+            sent += len(data)
+            # 按限速计算应当耗费的时间
+            delay = sent / self.rate - (time.perf_counter() - begin)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def start_server(handler):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_download(args):
+    """多连接分段下载吞吐量随连接数的变化"""
+    ThrottledRangeHandler.payload = os.urandom(args.size_mb * 1024 * 1024)
+    ThrottledRangeHandler.rate = args.rate_mb * 1024 * 1024
+    server = start_server(ThrottledRangeHandler)
+    url = f"http://127.0.0.1:{server.server_port}/artifact.zip"
+    work_dir = tempfile.mkdtemp()
+
+    print(f"文件大小 {args.size_mb} MB，单连接限速 {args.rate_mb} MB/s")
+    print(f"{'连接数':>6} {'耗时(s)':>10} {'吞吐量(MB/s)':>14}")
+    try:
+        for connections in args.connections:
+            file_path = os.path.join(work_dir, f"artifact_{connections}.zip")
+            begin = time.perf_counter()
+            comm.download_url(url, file_path, connections=connections)
+            elapsed = time.perf_counter() - begin
+            with open(file_path, "rb") as file:
+                assert file.read() == ThrottledRangeHandler.payload, "下载内容不一致"
+            os.remove(file_path)
+            print(f"{connections:>6} {elapsed:>10.2f} {args.size_mb / elapsed:>14.2f}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def make_listing_html(rows):
+    """生成与 autobuild 服务器格式相同的目录页面"""
+    lines = ['<tr><td class="link"><a href="../">Parent directory/</a></td>'
+             '<td class="size">-</td><td class="date">-</td></tr>']
+    for i in range(rows):
+        name = f"ICC-PRO.B_v1.7.{i // 100}.{i}_{'debug' if i % 2 else 'release'}.zip"
+        lines.append(f'<tr><td class="link"><a href="{name}" title="{name}">{name}</a></td>'
+                     f'<td class="size">{i % 900 + 1}.{i % 10} MiB</td>'
+                     f'<td class="date">2024-Jan-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}</td></tr>')
+    return ('<!DOCTYPE html><html><head><title>Index of /autobuild/firmwares/</title></head><body>'
+            '<h1>Index of /autobuild/firmwares/</h1><table id="list"><thead><tr>'
+            '<th><a href="?C=N&amp;O=A">File Name</a></th><th><a href="?C=S&amp;O=A">File Size</a></th>'
+            '<th><a href="?C=M&amp;O=A">Date</a></th></tr></thead><tbody>\n'
+            + "\n".join(lines) + '\n</tbody></table></body></html>')
+
+
+def parse_listing_bs4(text):
+    """原来的解析方式：构建 BeautifulSoup 树后逐行 select"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(text, 'html.parser')
+    tbody = soup.select('tbody')
+    rows = []
+    for tr in tbody[0].select('tr'):
+        first_td = tr.select('td')[0]
+        a_tag = first_td.find('a')
+        rows.append(a_tag.get("href"))
+    return rows
+
+
+def parse_listing_stream(text, chunk_size=comm.LISTING_CHUNK_SIZE):
+    chunks = (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+    return [entry.href for entry in comm.iter_listing(chunks)]
+
+
+def bench_parse(args):
+    """目录页面解析：BeautifulSoup 与流式解析对比"""
+    text = make_listing_html(args.rows)
+    expected = parse_listing_bs4(text)
+    assert parse_listing_stream(text) == expected, "解析结果不一致"
+
+    print(f"目录 {args.rows} 行，页面 {len(text) / 1024:.0f} KB，重复 {args.repeat} 次取最短")
+    results = []
+    for name, func in (("BeautifulSoup", parse_listing_bs4), ("iter_listing", parse_listing_stream)):
+        best = min(_timeit(func, text) for _ in range(args.repeat))
+        results.append(best)
+        print(f"{name:>14}: {best * 1000:>9.1f} ms")
+    print(f"{'加速比':>12}: {results[0] / results[1]:>9.1f}x")
+
+
+def _timeit(func, *args):
+    begin = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - begin
+
+
+def make_package_zip(archive_path, files, seed=None, changed=()):
+    """
+    生成类似 ICS Studio 安装包的压缩包：大量小文件（DLL、资源）和少量大文件
+    :param seed: 指定时内容由 seed 决定，相同 seed 生成的成员内容相同
+    :param changed: 内容与 seed 不同的成员序号，模拟相邻两次构建
+    """
+    rng = random.Random(seed)
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        for i in range(files):
+            size = 4 * 1024 * 1024 if i % 500 == 0 else 16 * 1024 + (i * 7919) % (96 * 1024)
+            # Random.randbytes 需要 Python 3.9，这里用 getrandbits 兼容 3.8
+            random_part = os.urandom(size // 2) if seed is None else \
+                rng.getrandbits(8 * (size // 2)).to_bytes(size // 2, "little")
+            if i in changed:
+                random_part = os.urandom(size // 2)
+            # 一半随机数据，一半重复数据，压缩率接近真实的二进制文件
+            data = random_part + bytes(range(256)) * (size // 512)
+            zip_ref.writestr(f"Bin/Module{i % 40}/Component{i}.dll", data)
+
+
+def tree_digest(path):
+    """目录树中所有文件的相对路径和内容摘要"""
+    digest = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            if name == comm.EXTRACT_MANIFEST:
+                continue
+            file_path = os.path.join(root, name)
+            with open(file_path, "rb") as file:
+                digest[os.path.relpath(file_path, path)] = hashlib.sha256(file.read()).hexdigest()
+    return digest
+
+
+def bench_unzip(args):
+    """并行解压与 extractall 的耗时对比"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        archive_path = os.path.join(work_dir, "package.zip")
+        make_package_zip(archive_path, args.files)
+        print(f"压缩包 {args.files} 个文件，{os.path.getsize(archive_path) / 1024 ** 2:.0f} MB，"
+              f"CPU 核数 {os.cpu_count()}，{'进程池' if args.processes else '线程池'}")
+
+        target = os.path.join(work_dir, "extractall")
+        begin = time.perf_counter()
+        with zipfile.ZipFile(archive_path) as zip_ref:
+            zip_ref.extractall(target)
+        baseline = time.perf_counter() - begin
+        expected = tree_digest(target)
+        shutil.rmtree(target)
+        print(f"{'extractall':>10}: {baseline:>7.2f}s")
+
+        for workers in args.workers:
+            target = os.path.join(work_dir, f"parallel_{workers}")
+            begin = time.perf_counter()
+            comm.extract_zip(archive_path, target, workers, args.processes)
+            elapsed = time.perf_counter() - begin
+            assert tree_digest(target) == expected, "解压结果与 extractall 不一致"
+            shutil.rmtree(target)
+            print(f"{workers:>8}并发: {elapsed:>7.2f}s  加速比 {baseline / elapsed:.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_incremental(args):
+    """相邻两次构建：完整解压与增量解压的耗时和新写入的数据量对比"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        changed = set(random.Random(1).sample(range(args.files), args.files * args.changed // 100))
+        old_zip = os.path.join(work_dir, "ICSStudio-v1.8.1-20240131.zip")
+        new_zip = os.path.join(work_dir, "ICSStudio-v1.8.2-20240201.zip")
+        make_package_zip(old_zip, args.files, seed=0)
+        make_package_zip(new_zip, args.files, seed=0, changed=changed)
+        print(f"压缩包 {args.files} 个文件，其中 {len(changed)} 个变化")
+        comm.extract_zip(old_zip, os.path.join(work_dir, "ICSStudio-v1.8.1-20240131"), 1)
+
+        target = os.path.join(work_dir, "ICSStudio-v1.8.2-20240201")
+        results = {}
+        for name, previous_path in (("完整解压", None),
+                                    ("增量解压", comm.find_previous_extraction(target))):
+            begin = time.perf_counter()
+            comm.extract_zip(new_zip, target, 1, previous_path=previous_path)
+            elapsed = time.perf_counter() - begin
+            results[name] = tree_digest(target)
+            # 硬链接的文件不占用新的磁盘空间
+            written = sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(target)
+                          for file in files if os.stat(os.path.join(root, file)).st_nlink == 1)
+            shutil.rmtree(target)
+            print(f"{name}: {elapsed:>7.2f}s  新写入 {written / 1024 ** 2:>7.1f} MB")
+        assert results["完整解压"] == results["增量解压"], "增量解压结果与完整解压不一致"
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TestTools 性能基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    download_parser = subparsers.add_parser("download", help="多连接分段下载")
+    download_parser.add_argument("--size-mb", type=int, default=64)
+    download_parser.add_argument("--rate-mb", type=int, default=8)
+    download_parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+    download_parser.set_defaults(func=bench_download)
+
+    parse_parser = subparsers.add_parser("parse", help="目录页面解析")
+    parse_parser.add_argument("--rows", type=int, default=10000)
+    parse_parser.add_argument("--repeat", type=int, default=5)
+    parse_parser.set_defaults(func=bench_parse)
+
+    unzip_parser = subparsers.add_parser("unzip", help="并行解压")
+    unzip_parser.add_argument("--files", type=int, default=4000)
+    unzip_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    unzip_parser.add_argument("--processes", action="store_true", help="使用进程池")
+    unzip_parser.set_defaults(func=bench_unzip)
+
+    incremental_parser = subparsers.add_parser("incremental", help="增量解压")
+    incremental_parser.add_argument("--files", type=int, default=4000)
+    incremental_parser.add_argument("--changed", type=int, default=5, help="变化文件的百分比")
+    incremental_parser.set_defaults(func=bench_incremental)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
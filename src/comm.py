@@ -1,17 +1,35 @@
+import asyncio
+import base64
+import codecs
 import datetime
+import hashlib
+import html
+import ipaddress
+import json
 import os
+import queue
 import re
+import shutil
+import socket
 import subprocess
 import telnetlib
+import threading
 import time
 import zipfile
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, \
+    TimeoutError as FutureTimeoutError, as_completed, wait as wait_futures
+from dataclasses import dataclass
 from ftplib import FTP
+from stat import S_ISDIR, S_ISLNK, S_ISREG
+from typing import Optional
+from urllib.parse import urlsplit
 
 import paramiko
 import psutil
 import rarfile
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 # 目录信息
 workspace = os.getcwd()
@@ -21,17 +39,202 @@ soft_path = workspace + '\\soft\\'
 # json_path = os.path.dirname(workspace) + '\\json\\'
 json_path = workspace + "\\json\\"
 
+# HTTP连接池：缓存的主机连接池数量、每个主机保持的最大连接数
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+
+_http_session = None
+_http_session_lock = threading.RLock()
+
+
+def configure_http_session(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                           pool_block=True, max_retries=0):
+    """
+    创建共享的HTTP会话，所有访问服务器的请求都通过它复用 keep-alive 连接
+    :param pool_connections: 缓存的主机连接池数量
+    :param pool_maxsize: 每个主机最多保持的连接数
+    :param pool_block: 每个主机的连接数达到上限时是否等待空闲连接，而不是新建临时连接
+    :param max_retries: 连接失败时的重试次数
+    :return: requests.Session
+    """
+    global _http_session
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=pool_block, max_retries=max_retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    with _http_session_lock:
+        old_session, _http_session = _http_session, session
+    if old_session is not None:
+        old_session.close()
+    return session
+
+
+def get_http_session():
+    """获取共享的HTTP会话，首次调用时按默认配置创建"""
+    with _http_session_lock:
+        if _http_session is None:
+            configure_http_session()
+        return _http_session
+
+
+# 构建服务器镜像
+MIRRORS = {"LAN": "http://172.16.2.240/", "Internet": "http://hub.i-con.cn:32208/"}
+# 自动选择镜像
+NETWORK_AUTO = "Auto"
+# 选择结果的有效期（秒）、探测超时（秒）、探测时读取的最大字节数、探测页面
+MIRROR_TTL = 10 * 60
+MIRROR_PROBE_TIMEOUT = 3
+MIRROR_PROBE_BYTES = 256 * 1024
+MIRROR_PROBE_PATH = "autobuild/icsstudio/"
+# 评分时的参考文件大小：评分为 延迟 + 参考大小 / 吞吐量，即下载参考大小的文件的预计耗时
+MIRROR_REFERENCE_SIZE = 4 * 1024 * 1024
+# 实际下载吞吐量低于另一个镜像探测值的该比例时，视为当前镜像性能下降，重新选择
+MIRROR_DEGRADE_RATIO = 0.5
+
+
+class MirrorSelector:
+    """
+    在内网和外网镜像之间自动选择
+    同时探测所有镜像的延迟（到收到响应头的时间）和吞吐量，选择评分最好的可达镜像并缓存 ttl 秒；
+    使用中连接失败或下载吞吐量明显下降时丢弃缓存，改用另一个镜像
+    """
+
+    def __init__(self, mirrors=None, ttl=MIRROR_TTL, probe_timeout=MIRROR_PROBE_TIMEOUT):
+        self.mirrors = mirrors or MIRRORS
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self.results = {}  # 网络 -> dict(latency, throughput, score)，不可达时为 None
+        self._winner = None
+        self._chosen_at = 0.0
+        self._lock = threading.RLock()
+
+    def select(self, exclude=()):
+        """
+        选择最快的可达镜像
+        :param exclude: 不考虑的网络
+        :return: 网络 LAN / Internet
+        """
+        with self._lock:
+            if (self._winner is not None and self._winner not in exclude
+                    and time.monotonic() - self._chosen_at < self.ttl):
+                return self._winner
+
+            candidates = [network for network in self.mirrors if network not in exclude]
+            self.results.update(self.probe_all(candidates))
+            reachable = [network for network in candidates if self.results.get(network)]
+            if not reachable:
+                self._winner = None
+                raise requests.exceptions.ConnectionError(f"镜像均不可达: {', '.join(candidates)}")
+
+            self._winner = min(reachable, key=lambda network: self.results[network]["score"])
+            self._chosen_at = time.monotonic()
+            result = self.results[self._winner]
+            print(f"自动选择镜像: {self._winner}, 延迟 {result['latency'] * 1000:.0f} ms, "
+                  f"吞吐量 {result['throughput'] / 1024 ** 2:.2f} MB/s")
+            return self._winner
+
+    def probe_all(self, networks):
+        """
+        同时探测多个镜像，超时未完成的视为不可达
+        :return: {网络: 探测结果或 None}
+        """
+        results = dict.fromkeys(networks)
+        executor = ThreadPoolExecutor(max_workers=max(1, len(networks)))
+        futures = {executor.submit(self.probe, network): network for network in networks}
+        try:
+            for future in as_completed(futures, timeout=self.probe_timeout * 2):
+                try:
+                    results[futures[future]] = future.result()
+                except (requests.exceptions.RequestException, IOError) as e:
+                    print(f"{futures[future]}: 镜像不可达: {e}")
+        except FutureTimeoutError:
+            pass
+        finally:
+            executor.shutdown(wait=False)
+        return results
+
+    def probe(self, network):
+        """
+        探测一个镜像
+        :return: dict(latency, throughput, score)
+        """
+        url = self.mirrors[network] + MIRROR_PROBE_PATH
+        begin = time.perf_counter()
+        with get_http_session().get(url, stream=True, timeout=(self.probe_timeout, self.probe_timeout)) as response:
+            latency = time.perf_counter() - begin
+            if response.status_code >= 500:
+                raise IOError(f"status {response.status_code}")
+            size = 0
+            for chunk in response.iter_content(chunk_size=LISTING_CHUNK_SIZE):
+                size += len(chunk)
+                if size >= MIRROR_PROBE_BYTES:
+                    break
+        elapsed = max(time.perf_counter() - begin - latency, 1e-3)
+        throughput = max(size / elapsed, 1.0)
+        return {"latency": latency, "throughput": throughput,
+                "score": latency + MIRROR_REFERENCE_SIZE / throughput}
+
+    def report_failure(self, network):
+        """使用中连接失败，下次重新选择"""
+        with self._lock:
+            self.results[network] = None
+            if self._winner == network:
+                self._winner = None
+
+    def report_throughput(self, network, size, elapsed):
+        """
+        记录实际下载的吞吐量，明显低于另一个镜像的探测值时下次重新选择
+        :param size: 下载的字节数
+        :param elapsed: 耗时（秒）
+        """
+        if size < MIRROR_PROBE_BYTES or elapsed <= 0:
+            return
+        throughput = size / elapsed
+        with self._lock:
+            others = [result["throughput"] for other, result in self.results.items()
+                      if other != network and result]
+            if self._winner == network and others and throughput < max(others) * MIRROR_DEGRADE_RATIO:
+                print(f"{network}: 下载吞吐量 {throughput / 1024 ** 2:.2f} MB/s，低于其他镜像，重新选择镜像")
+                self._winner = None
+
+    def call(self, func, network=NETWORK_AUTO):
+        """
+        network 为 Auto 时用最快的镜像调用 func(网络)，连接失败时换用另一个镜像重试；否则直接调用
+        :return: func 的返回值
+        """
+        if network != NETWORK_AUTO:
+            return func(network)
+        tried = []
+        while True:
+            chosen = self.select(exclude=tried)
+            try:
+                return func(chosen)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                print(f"{chosen}: 连接失败，切换镜像: {e}")
+                self.report_failure(chosen)
+                tried.append(chosen)
+                if len(tried) >= len(self.mirrors):
+                    raise
+
+
+mirror_selector = MirrorSelector()
+
 
 def get_server_url(soft_type='ICS', edition="Debug", network="LAN"):
     """
     获得网址
     :param soft_type: 软件类型 ICS/ICC/ICM
     :param edition: 软件版本
-    :param network: 内网LAN 外网Internet
+    :param network: 内网LAN 外网Internet 自动选择Auto
     :return:
     """
-    lan_url = "http://172.16.2.240/"
-    internet_url = "http://hub.i-con.cn:32208/"
+    if network == NETWORK_AUTO:
+        network = mirror_selector.select()
+    lan_url = MIRRORS["LAN"]
+    internet_url = MIRRORS["Internet"]
 
     url_mapping = {
         ("ICS", "Debug", "LAN"): f'{lan_url}autobuild/icsstudio/',
@@ -57,7 +260,7 @@ def get_server_url(soft_type='ICS', edition="Debug", network="LAN"):
     # 参数校验
     valid_soft_types = ['ICS', 'ICC', 'ICM', 'AENTR', 'BAENTR', 'VP', 'ICP', 'ICF']
     valid_editions = [' ', 'Debug', 'Release']
-    valid_networks = ['LAN', 'Internet']
+    valid_networks = ['LAN', 'Internet', NETWORK_AUTO]
 
     if soft_type not in valid_soft_types or edition not in valid_editions or network not in valid_networks:
         raise ValueError("Invalid input parameters")
@@ -68,60 +271,592 @@ def get_server_url(soft_type='ICS', edition="Debug", network="LAN"):
         raise ValueError("No URL mapping found for the provided parameters")
 
 
-def download_file(file_name, file_save_path, soft_type='ICS', edition="Debug", network="LAN"):
+# 下载时每次写入磁盘的块大小
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# 下载超时（连接超时，读取超时）
+DOWNLOAD_TIMEOUT = (10, 60)
+# 外网下载默认并发连接数，内网默认单连接
+INTERNET_DOWNLOAD_CONNECTIONS = 4
+# 分段下载时每段的最小字节数，小文件不拆分
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+# 未完成下载文件的后缀
+PART_SUFFIX = ".part"
+# 校验文件后缀，内容与 sha256sum 输出格式相同
+CHECKSUM_SUFFIX = ".sha256"
+
+# 传输优先级及权重：设置了全局限速时按权重分配带宽
+TRANSFER_PRIORITIES = {"interactive": 8, "log": 4, "background": 1}
+# 未设置全局限速时，有其他优先级的传输进行中，后台传输限制到该速率（字节/秒）
+TRANSFER_BACKGROUND_RATE = 1024 * 1024
+# 限速时允许的突发时长（秒）
+TRANSFER_BURST = 0.5
+
+
+class TransferJob:
     """
-    下载文件
-    :param network: 内网LAN 外网Internet
+    一次传输任务（一个文件或一组文件），由 TransferScheduler.job 创建
+    用 with 语句包围传输过程，每传输一块数据调用 consume，超出分配的速率时阻塞
+    """
+
+    def __init__(self, scheduler, name, priority, rate_limit):
+        self.scheduler = scheduler
+        self.name = name
+        self.priority = priority
+        self.rate_limit = rate_limit
+        self.rate = None  # 当前分配的速率，None 不限速
+        self.transferred = 0
+        self._next_time = 0.0
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self._depth == 0:
+            self.scheduler._register(self)
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0:
+            self.scheduler._unregister(self)
+
+    def consume(self, size):
+        """记录已传输的字节数，按分配的速率等待"""
+        with self._lock:
+            self.transferred += size
+            rate = self.rate
+            if not rate:
+                return
+            now = time.monotonic()
+            self._next_time = max(self._next_time, now - TRANSFER_BURST) + size / rate
+            delay = self._next_time - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class TransferScheduler:
+    """
+    HTTP、FTP、SFTP 传输的带宽调度
+    设置全局限速时，按优先级权重在进行中的任务之间分配，单个任务的限速低于分配值时多余的部分分给其他任务；
+    未设置全局限速时只限制单个任务的速率，且有交互下载或日志传输进行中时后台传输让出带宽
+    """
+
+    def __init__(self, rate_limit=0, background_rate=TRANSFER_BACKGROUND_RATE):
+        """
+        :param rate_limit: 全局限速（字节/秒），0 不限速
+        :param background_rate: 未设置全局限速时后台传输让出带宽后的速率（字节/秒）
+        """
+        self.rate_limit = rate_limit
+        self.background_rate = background_rate
+        self._jobs = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def job(self, name, priority="interactive", rate_limit=0):
+        """
+        创建传输任务，当前线程已在任务中时返回该任务（如后台预取、获取日志中的各个文件）
+        :param name: 任务名称
+        :param priority: 优先级 interactive / log / background
+        :param rate_limit: 单个任务限速（字节/秒），0 不限速
+        :return: TransferJob
+        """
+        current = getattr(self._local, "job", None)
+        if current is not None:
+            return current
+        if priority not in TRANSFER_PRIORITIES:
+            raise ValueError(f"未知的传输优先级: {priority}")
+        return TransferJob(self, name, priority, rate_limit)
+
+    def set_rate_limit(self, rate_limit):
+        """修改全局限速，立即对进行中的任务生效"""
+        with self._lock:
+            self.rate_limit = rate_limit
+            self._rebalance()
+
+    def active_jobs(self):
+        """进行中的任务"""
+        with self._lock:
+            return list(self._jobs)
+
+    def _register(self, job):
+        self._local.job = job
+        with self._lock:
+            self._jobs.append(job)
+            self._rebalance()
+
+    def _unregister(self, job):
+        if getattr(self._local, "job", None) is job:
+            self._local.job = None
+        with self._lock:
+            if job in self._jobs:
+                self._jobs.remove(job)
+            self._rebalance()
+
+    def _rebalance(self):
+        """重新分配各任务的速率"""
+        if not self.rate_limit:
+            busy = any(job.priority != "background" for job in self._jobs)
+            for job in self._jobs:
+                rate = job.rate_limit or None
+                if busy and job.priority == "background":
+                    rate = min(rate or self.background_rate, self.background_rate)
+                job.rate = rate
+            return
+
+        remaining = self.rate_limit
+        pending = list(self._jobs)
+        while pending:
+            total_weight = sum(TRANSFER_PRIORITIES[job.priority] for job in pending)
+            shares = {job: remaining * TRANSFER_PRIORITIES[job.priority] / total_weight for job in pending}
+            capped = [job for job in pending if job.rate_limit and job.rate_limit < shares[job]]
+            if not capped:
+                for job in pending:
+                    job.rate = shares[job]
+                break
+            for job in capped:
+                job.rate = job.rate_limit
+                remaining -= job.rate_limit
+                pending.remove(job)
+
+
+transfer_scheduler = TransferScheduler()
+
+
+def download_file(file_name, file_save_path, soft_type='ICS', edition="Debug", network="LAN",
+                  progress_callback=None, chunk_size=DOWNLOAD_CHUNK_SIZE, connections=None, write_checksum=True):
+    """
+    下载文件，按块流式写入磁盘，内存占用与文件大小无关
+    :param network: 内网LAN 外网Internet 自动选择Auto（连接失败时切换镜像续传）
     :param file_name: 文件名
     :param file_save_path: 保存路径
     :param soft_type: 软件类型 ICC / ICS /ICM
     :param edition: 软件版本 Debug / Release
-    :return:
+    :param progress_callback: 进度回调 progress_callback(已下载字节数, 总字节数)，总字节数未知时为 None
+    :param chunk_size: 每次写入的块大小
+    :param connections: 并发连接数，None 时外网使用 INTERNET_DOWNLOAD_CONNECTIONS，内网使用1
+    :param write_checksum: 下载完成后在文件旁写入 .sha256 校验文件
+    :return: 成功时返回文件的 SHA-256
     """
+    if network == NETWORK_AUTO:
+        return mirror_selector.call(
+            lambda mirror: download_file(file_name, file_save_path, soft_type, edition, mirror, progress_callback,
+                                         chunk_size, connections, write_checksum))
 
     file_server = get_server_url(soft_type, edition, network)
     if not file_server:
         return False
 
+    file_path = os.path.join(file_save_path, file_name)
+    # 服务器校验值只请求一次，既用于判断已有文件，也用于校验下载结果
+    expected = get_server_checksum(file_name, soft_type, edition, network)
+    if os.path.isfile(file_path):  # 判断目录下是有同样文件
+        if expected is None:
+            print(f"{file_name}:已存在该文件，不进行下载")
+            raise FileExistsError
+        digest = read_checksum(file_path)
+        if digest is None:
+            # 没有有效的校验文件时计算一次
+            digest = file_sha256(file_path)
+            if write_checksum:
+                save_checksum(file_path, digest)
+        if digest == expected:
+            print(f"{file_name}:已存在校验通过的文件，不进行下载")
+            raise FileExistsError
+        # 本地文件已过期或损坏，删除后重新下载
+        print(f"{file_name}:已存在该文件，但与服务器校验值不一致，重新下载")
+        os.remove(file_path)
+        if os.path.isfile(file_path + CHECKSUM_SUFFIX):
+            os.remove(file_path + CHECKSUM_SUFFIX)
+
+    if connections is None:
+        connections = INTERNET_DOWNLOAD_CONNECTIONS if network == "Internet" else 1
+
     try:
-        response = requests.get(file_server + file_name)
-        file_path = os.path.join(file_save_path, file_name)
-        if response.status_code == 200:
-            if not os.path.isfile(file_path):  # 判断目录下是有同样文件
-                with open(file_path, 'wb') as file:
-                    file.write(response.content)
-                print(f"{file_name}:File downloaded successfully.")
-                return True
-            else:
-                print(f"{file_name}:已存在该文件，不进行下载")
-                raise FileExistsError
-        else:
+        begin = time.perf_counter()
+        digest = download_url(file_server + file_name, file_path, progress_callback, chunk_size, connections,
+                              expected)
+        if not digest:
             print(f"{file_name}:Failed to download file.")
             return False
+        mirror_selector.report_throughput(network, os.path.getsize(file_path), time.perf_counter() - begin)
+        if write_checksum:
+            save_checksum(file_path, digest)
+        print(f"{file_name}:File downloaded successfully.")
+        return digest
 
     except Exception as e:
         print(f"{file_name}: An error occurred: {e}")
         raise e
 
 
-def unzip_file(zip_file_path, zip_file_name, extract_dir=None):
+def download_url(url, file_path, progress_callback=None, chunk_size=DOWNLOAD_CHUNK_SIZE, connections=1,
+                 expected_sha256=None):
+    """
+    下载url到本地文件
+    数据先写入 file_path + '.part'，并在 '.part.json' 中记录各分段进度；下载中断后再次调用时，
+    用 Range 请求从断点续传。只有大小和 SHA-256 校验通过的完整文件才会重命名为 file_path。
+    connections>1 且服务器支持 Accept-Ranges 时按字节范围拆分，多连接并行下载；否则单连接下载
+    SHA-256 在写入数据块的同时计算：从文件开头连续到达的数据直接在内存中计算，
+    续传前已下载的部分和并行下载时后面分段的数据，在下载完成后从文件补读。
+    下载速率由 transfer_scheduler 调度，当前线程不在传输任务中时按交互下载处理
+    :param url: 下载地址
+    :param file_path: 本地文件路径
+    :param progress_callback: 进度回调 progress_callback(已下载字节数, 总字节数)，总字节数未知时为 None
+    :param chunk_size: 每次写入的块大小
+    :param connections: 并发连接数
+    :param expected_sha256: 期望的 SHA-256，None 时使用服务器响应头中的校验值（如果有）
+    :return: 成功时返回文件的 SHA-256，服务器返回非200 False
+    """
+    part_path = file_path + PART_SUFFIX
+    state_path = part_path + ".json"
+
+    info = _probe_url(url)
+    if info is None:
+        return False
+
+    state = _load_part_state(state_path, part_path, url, info)
+    if state is not None:
+        print(f"{url}: 断点续传，已下载 {_part_done(state)}/{state['total']} bytes")
+    else:
+        state = _new_part_state(part_path, state_path, url, info, connections)
+
+    hasher = _InlineHasher()
+    with transfer_scheduler.job(url) as job:
+        if state["segments"] is None:
+            # 服务器不支持分段，无法续传，失败时直接删除
+            try:
+                _download_stream(url, part_path, progress_callback, chunk_size, hasher, job)
+            except BaseException:
+                _remove_part(part_path, state_path)
+                raise
+        else:
+            try:
+                _download_ranges(url, part_path, state_path, state, progress_callback, chunk_size, hasher, job)
+            except BaseException:
+                if state.get("stale"):
+                    _remove_part(part_path, state_path)
+                raise
+
+    total = state["total"]
+    if total is not None and os.path.getsize(part_path) != total:
+        _remove_part(part_path, state_path)
+        raise IOError(f"{url}: 文件大小校验失败")
+
+    digest = hasher.finish(part_path, chunk_size)
+    expected_sha256 = expected_sha256 or info.get("sha256")
+    if expected_sha256 and digest != expected_sha256.lower():
+        _remove_part(part_path, state_path)
+        raise IOError(f"{url}: SHA-256 校验失败, 期望 {expected_sha256}, 实际 {digest}")
+
+    os.replace(part_path, file_path)
+    if os.path.isfile(state_path):
+        os.remove(state_path)
+    return digest
+
+
+def _probe_url(url):
+    """
+    查询文件大小、校验信息及是否支持分段下载
+    :return: dict，服务器返回非200时为 None
+    """
+    response = get_http_session().head(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+    if response.status_code == 405:  # 不支持HEAD，按未知大小处理
+        return {"total": None, "accept_ranges": False, "etag": None, "last_modified": None, "sha256": None}
+    if response.status_code != 200:
+        return None
+    content_length = response.headers.get("Content-Length")
+    return {
+        "total": int(content_length) if content_length and content_length.isdigit() else None,
+        "accept_ranges": response.headers.get("Accept-Ranges", "").lower() == "bytes",
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": _header_checksum(response.headers),
+    }
+
+
+_SHA256_RE = re.compile(r'[0-9a-fA-F]{64}')
+
+
+def _header_checksum(headers):
+    """
+    响应头中服务器提供的 SHA-256：X-Checksum-Sha256（Artifactory 等）或 Digest: SHA-256=<base64>（RFC 3230）
+    :return: 十六进制小写字符串，没有时为 None
+    """
+    value = headers.get("X-Checksum-Sha256", "").strip()
+    if _SHA256_RE.fullmatch(value):
+        return value.lower()
+    for item in headers.get("Digest", "").split(","):
+        algorithm, _, encoded = item.strip().partition("=")
+        if algorithm.lower() == "sha-256" and encoded:
+            try:
+                return base64.b64decode(encoded).hex()
+            except ValueError:
+                return None
+    return None
+
+
+def get_server_checksum(file_name, soft_type='ICS', edition="Debug", network="LAN"):
+    """
+    服务器目录中与文件同名的 .sha256 校验文件的内容
+    只在已缓存的目录列表中查找，目录中没有校验文件时不发送请求
+    :return: 十六进制小写字符串，没有时为 None
+    """
+    file_server = get_server_url(soft_type, edition, network)
+    entry = listing_cache.get(file_server) if file_server else None
+    if entry is None or not any(row.href == file_name + CHECKSUM_SUFFIX for row in entry["rows"]):
+        return None
+    try:
+        response = get_http_session().get(file_server + file_name + CHECKSUM_SUFFIX, timeout=DOWNLOAD_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"{file_name}: 获取校验文件失败: {e}")
+        return None
+    match = _SHA256_RE.search(response.text) if response.status_code == 200 else None
+    return match.group(0).lower() if match else None
+
+
+def read_checksum(file_path):
+    """
+    读取文件旁的 .sha256 校验文件，不读取文件本身
+    校验文件在文件之后写入，文件修改时间晚于校验文件或大小为0时视为无效
+    :return: 十六进制小写字符串，不存在或无效时为 None
+    """
+    checksum_path = file_path + CHECKSUM_SUFFIX
+    try:
+        if os.path.getmtime(checksum_path) < os.path.getmtime(file_path) or not os.path.getsize(file_path):
+            return None
+        with open(checksum_path, 'r', encoding='utf-8') as file:
+            match = _SHA256_RE.match(file.read())
+    except OSError:
+        return None
+    return match.group(0).lower() if match else None
+
+
+def save_checksum(file_path, digest):
+    """在文件旁写入 sha256sum 格式的校验文件"""
+    with open(file_path + CHECKSUM_SUFFIX, 'w', encoding='utf-8') as file:
+        file.write(f"{digest} *{os.path.basename(file_path)}\n")
+
+
+class _InlineHasher:
+    """
+    按文件偏移顺序计算 SHA-256
+    与已计算位置连续的数据块在写入时直接计算；并行分段或续传时不连续的部分，在 finish 时从文件补读
+    """
+
+    def __init__(self):
+        self._sha256 = hashlib.sha256()
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def update(self, offset, data):
+        with self._lock:
+            if offset == self._offset:
+                self._sha256.update(data)
+                self._offset += len(data)
+
+    def finish(self, file_path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        """补读尚未计算的部分，返回十六进制摘要"""
+        with self._lock:
+            with open(file_path, 'rb') as file:
+                file.seek(self._offset)
+                for chunk in iter(lambda: file.read(chunk_size), b''):
+                    self._sha256.update(chunk)
+                    self._offset += len(chunk)
+            return self._sha256.hexdigest()
+
+
+def _new_part_state(part_path, state_path, url, info, connections):
+    """创建新的 .part 文件及进度记录，segments 为 [起始, 结束, 已写入] 列表"""
+    total = info["total"]
+    segments = None
+    if info["accept_ranges"] and total:
+        connections = max(1, min(connections, total // MIN_SEGMENT_SIZE))
+        segment_size = -(-total // connections)
+        segments = [[start, min(start + segment_size, total) - 1, 0] for start in range(0, total, segment_size)]
+    elif connections > 1:
+        print(f"{url}: 服务器不支持分段下载，使用单连接下载")
+
+    with open(part_path, 'wb') as file:
+        if total:
+            file.truncate(total)
+
+    state = {
+        "url": url,
+        "total": total,
+        "etag": info["etag"],
+        "last_modified": info["last_modified"],
+        "segments": segments,
+    }
+    if segments is not None:
+        _save_part_state(state_path, state)
+    return state
+
+
+def _load_part_state(state_path, part_path, url, info):
+    """
+    读取进度记录，与服务器当前文件不一致时丢弃
+    只比较url的路径，切换镜像后大小和 ETag/Last-Modified 相同的文件可以继续续传
+    """
+    if not os.path.isfile(part_path) or not os.path.isfile(state_path):
+        return None
+    try:
+        with open(state_path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if (urlsplit(state.get("url", "")).path != urlsplit(url).path or state.get("total") != info["total"]
+            or not info["accept_ranges"] or state.get("etag") != info["etag"]
+            or state.get("last_modified") != info["last_modified"] or not state.get("segments") or os.path.getsize(part_path) != info["total"]):
+        _remove_part(part_path, state_path)
+        return None
+    return state
+
+
+def _save_part_state(state_path, state):
+    """原子写入进度记录"""
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+    os.replace(tmp_path, state_path)
+
+
+def _remove_part(part_path, state_path):
+    for path in (part_path, state_path):
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def _part_done(state):
+    return sum(segment[2] for segment in state["segments"])
+
+
+def _download_stream(url, file_path, progress_callback, chunk_size, hasher, job):
+    """单连接流式下载，用于不支持分段的服务器"""
+    with get_http_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code != 200:
+            raise IOError(f"{url}: 下载失败, status {response.status_code}")
+
+        content_length = response.headers.get("Content-Length")
+        total = int(content_length) if content_length and content_length.isdigit() else None
+        done = 0
+        if progress_callback:
+            progress_callback(done, total)
+
+        with open(file_path, 'wb') as file:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                file.write(chunk)
+                hasher.update(done, chunk)
+                done += len(chunk)
+                job.consume(len(chunk))
+                if progress_callback:
+                    progress_callback(done, total)
+
+    if total is not None and done != total:
+        raise IOError(f"{url}: 下载不完整 {done}/{total} bytes")
+
+
+def _download_ranges(url, part_path, state_path, state, progress_callback, chunk_size, hasher, job):
+    """按进度记录下载未完成的分段，多个分段时并行下载"""
+    total = state["total"]
+    pending = [segment for segment in state["segments"] if segment[2] < segment[1] - segment[0] + 1]
+
+    lock = threading.Lock()
+    progress = {"done": _part_done(state), "saved_at": time.monotonic()}
+    if progress_callback:
+        progress_callback(progress["done"], total)
+
+    def on_chunk(segment, size):
+        with lock:
+            segment[2] += size
+            progress["done"] += size
+            # 每秒最多保存一次进度
+            if time.monotonic() - progress["saved_at"] >= 1:
+                _save_part_state(state_path, state)
+                progress["saved_at"] = time.monotonic()
+            if progress_callback:
+                progress_callback(progress["done"], total)
+
+    try:
+        if len(pending) == 1:
+            _download_segment(url, part_path, pending[0], state, chunk_size, on_chunk, hasher, job)
+        elif pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = [executor.submit(_download_segment, url, part_path, segment, state, chunk_size, on_chunk,
+                                           hasher, job)
+                           for segment in pending]
+                for future in futures:
+                    future.result()
+    finally:
+        with lock:
+            if os.path.isfile(part_path):
+                _save_part_state(state_path, state)
+
+    if _part_done(state) != total:
+        raise IOError(f"{url}: 下载不完整 {_part_done(state)}/{total} bytes")
+
+
+def _download_segment(url, part_path, segment, state, chunk_size, on_chunk, hasher, job):
+    """从断点下载一个分段，使用独立的文件句柄写入对应偏移"""
+    start, end, written = segment
+    headers = {"Range": f"bytes={start + written}-{end}"}
+    validator = state["etag"] or state["last_modified"]
+    if validator:
+        # 服务器文件已变化时返回200整个文件，而不是206
+        headers["If-Range"] = validator
+
+    with get_http_session().get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 200 and validator:
+            state["stale"] = True
+            raise IOError(f"{url}: 服务器文件已变化，需要重新下载")
+        if response.status_code != 206:
+            raise IOError(f"{url}: 分段请求失败 {start}-{end}, status {response.status_code}")
+        with open(part_path, 'r+b') as file:
+            file.seek(start + written)
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                file.write(chunk)
+                file.flush()
+                hasher.update(start + segment[2], chunk)
+                on_chunk(segment, len(chunk))
+                job.consume(len(chunk))
+
+    if segment[2] != end - start + 1:
+        raise IOError(f"{url}: 分段下载不完整 {start}-{end}, {segment[2]} bytes")
+
+
+# 并行解压的默认线程数，成员数少于 PARALLEL_EXTRACT_MIN_MEMBERS 的压缩包直接单线程解压
+EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+PARALLEL_EXTRACT_MIN_MEMBERS = 64
+# 增量解压：与同一产品上一次解压的目录对比，未变化的文件使用硬链接
+INCREMENTAL_EXTRACT = True
+# 解压清单，保存在解压目录中，记录每个成员的 CRC、大小和解压后的修改时间
+EXTRACT_MANIFEST = ".extract_manifest.json"
+
+
+def unzip_file(zip_file_path, zip_file_name, extract_dir=None, workers=None, use_processes=False,
+               incremental=INCREMENTAL_EXTRACT):
     """
     解压文件 可解压zip和rar格式
+    zip 文件成员较多时按压缩大小均分到多个线程（或进程）并行解压，每个线程使用独立的文件句柄，
+    解压结果与 extractall 相同
     :param zip_file_path: 解压文件地址
     :param zip_file_name: 解压文件名字包含拓展名
     :param extract_dir:  解压地址
+    :param workers: 并行解压数，None 时使用 EXTRACT_WORKERS，1 为单线程
+    :param use_processes: 使用进程池代替线程池
+    :param incremental: 增量解压，复用同一产品上一次解压目录中未变化的文件
     :return:
     """
     if extract_dir is None:
         extract_dir = zip_file_path
     path = os.path.join(extract_dir, zip_file_name[:-4])
     if not os.path.isdir(path):
-        if zip_file_name[-3:] == 'zip':
-            with zipfile.ZipFile(zip_file_path + "/" + zip_file_name, 'r') as zip_ref:
-                zip_ref.extractall(str(path))
-        elif zip_file_name[-3:] == 'rar':
-            with rarfile.RarFile(zip_file_path + "/" + zip_file_name, 'r') as rar_file:
-                rar_file.extractall(path)
+        previous_path = find_previous_extraction(path) if incremental else None
+        extract_archive(zip_file_path + "/" + zip_file_name, str(path), workers, use_processes, previous_path)
         print(f"{zip_file_name[:-4]}:RAR file extracted successfully.")
         return True
     else:
@@ -129,6 +864,571 @@ def unzip_file(zip_file_path, zip_file_name, extract_dir=None):
         raise FileExistsError
 
 
+def extract_archive(archive_path, target_path, workers=None, use_processes=False, previous_path=None):
+    """
+    按扩展名解压zip或rar文件
+    :param archive_path: 压缩文件路径
+    :param target_path: 解压目录
+    :param workers: zip并行解压数，None 时使用 EXTRACT_WORKERS
+    :param use_processes: 使用进程池代替线程池
+    :param previous_path: zip增量解压时对比的上一次解压目录
+    :return:
+    """
+    if archive_path[-3:] == 'zip':
+        extract_zip(archive_path, target_path, EXTRACT_WORKERS if workers is None else workers, use_processes,
+                    previous_path)
+    elif archive_path[-3:] == 'rar':
+        with rarfile.RarFile(archive_path, 'r') as rar_file:
+            rar_file.extractall(target_path)
+
+
+def extract_zip(archive_path, target_path, workers=EXTRACT_WORKERS, use_processes=False, previous_path=None):
+    """
+    解压zip文件到目标目录，并在目录中写入解压清单
+    指定 previous_path 时，CRC 和大小与上一次解压相同、且解压后未被修改的成员直接硬链接，只解压变化的成员
+    :param archive_path: zip文件路径
+    :param target_path: 解压目录
+    :param workers: 并行解压数
+    :param use_processes: 使用进程池代替线程池
+    :param previous_path: 上一次解压的目录，None 时完整解压
+    :return:
+    """
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        infos = zip_ref.infolist()
+        linked = _link_unchanged(infos, target_path, previous_path) if previous_path else set()
+        pending = [info for info in infos if not info.is_dir() and info.filename not in linked]
+
+        if not linked and (workers <= 1 or len(infos) < PARALLEL_EXTRACT_MIN_MEMBERS):
+            zip_ref.extractall(target_path)
+            pending = []
+        else:
+            # 先创建目录成员，减少并行时的目录创建竞争
+            for info in infos:
+                if info.is_dir():
+                    zip_ref.extract(info, target_path)
+            if workers <= 1 or len(pending) < PARALLEL_EXTRACT_MIN_MEMBERS:
+                for info in pending:
+                    zip_ref.extract(info, target_path)
+                pending = []
+
+    if pending:
+        # 按压缩大小从大到小分配给当前负载最小的线程
+        groups = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for info in sorted(pending, key=lambda i: i.compress_size, reverse=True):
+            index = loads.index(min(loads))
+            groups[index].append(info.filename)
+            loads[index] += info.compress_size + 1
+
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_members, archive_path, target_path, names)
+                       for names in groups if names]
+            for future in futures:
+                future.result()
+
+    if linked:
+        print(f"{os.path.basename(target_path)}: 增量解压，复用 {len(linked)} 个文件，"
+              f"解压 {sum(1 for info in infos if not info.is_dir()) - len(linked)} 个文件")
+    _write_extract_manifest(target_path, infos)
+
+
+def find_previous_extraction(target_path):
+    """
+    查找同一目录下同一产品最近一次解压的目录
+    文件名中的版本号、日期等数字替换后相同视为同一产品，只考虑带有解压清单的目录
+    :param target_path: 本次解压目录
+    :return: 目录路径，没有时为 None
+    """
+    parent, name = os.path.split(os.path.normpath(target_path))
+    key = _build_key(name)
+    latest = None
+    try:
+        entries = list(os.scandir(parent))
+    except OSError:
+        return None
+    for entry in entries:
+        if entry.name == name or not entry.is_dir() or _build_key(entry.name) != key:
+            continue
+        try:
+            mtime = os.path.getmtime(os.path.join(entry.path, EXTRACT_MANIFEST))
+        except OSError:
+            continue
+        if latest is None or mtime > latest[0]:
+            latest = (mtime, entry.path)
+    return latest[1] if latest else None
+
+
+def _build_key(name):
+    return re.sub(r'\d+', '#', name)
+
+
+def _member_path(target_path, name):
+    """成员解压后的路径，包含绝对路径或 .. 的成员返回 None，交给 zipfile 处理"""
+    parts = name.split('/')
+    if name.startswith('/') or ':' in parts[0] or any(part in ('..', '') for part in parts[:-1]):
+        return None
+    return os.path.join(target_path, *parts)
+
+
+def _link_unchanged(infos, target_path, previous_path):
+    """
+    硬链接上一次解压目录中未变化的成员
+    :return: 已链接的成员名集合
+    """
+    try:
+        with open(os.path.join(previous_path, EXTRACT_MANIFEST), 'r', encoding='utf-8') as file:
+            members = json.load(file)["members"]
+    except (OSError, ValueError, KeyError):
+        return set()
+
+    linked = set()
+    for info in infos:
+        previous = members.get(info.filename)
+        if info.is_dir() or previous is None or previous[:2] != [info.CRC, info.file_size]:
+            continue
+        source = _member_path(previous_path, info.filename)
+        dest = _member_path(target_path, info.filename)
+        if source is None or dest is None:
+            continue
+        try:
+            stat = os.stat(source)
+            # 上一次解压后被修改过的文件不复用
+            if stat.st_size != info.file_size or stat.st_mtime_ns != previous[2]:
+                continue
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.link(source, dest)
+        except OSError:
+            continue  # 文件系统不支持硬链接或跨分区，改为解压
+        linked.add(info.filename)
+    return linked
+
+
+def _write_extract_manifest(target_path, infos):
+    members = {}
+    for info in infos:
+        path = None if info.is_dir() else _member_path(target_path, info.filename)
+        if path is None:
+            continue
+        try:
+            members[info.filename] = [info.CRC, info.file_size, os.stat(path).st_mtime_ns]
+        except OSError:
+            pass
+    with open(os.path.join(target_path, EXTRACT_MANIFEST), 'w', encoding='utf-8') as file:
+        json.dump({"members": members}, file, ensure_ascii=False)
+
+
+def _extract_members(archive_path, target_path, names):
+    """在独立的文件句柄上解压指定成员"""
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        for name in names:
+            try:
+                zip_ref.extract(name, target_path)
+            except FileExistsError:
+                # 其他线程同时创建了同一个上级目录，目录已存在后重试
+                zip_ref.extract(name, target_path)
+
+
+# 目录列表缓存：缓存目录、条目有效期（秒）、最多条目数、最大占用字节数
+LISTING_CACHE_DIR = os.path.join(workspace, "cache", "listing")
+LISTING_CACHE_TTL = 7 * 24 * 3600
+LISTING_CACHE_MAX_ENTRIES = 64
+LISTING_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# 缓存格式版本，解析结果的结构变化时递增
+LISTING_CACHE_VERSION = 2
+# 读取目录页面的块大小
+LISTING_CHUNK_SIZE = 64 * 1024
+
+# 目录中的一行：链接、大小、修改时间（均为页面上的原始文本）
+ListingEntry = namedtuple("ListingEntry", ["href", "size", "mtime"])
+
+
+class ListingCache:
+    """
+    服务器目录列表的磁盘缓存
+    以url为键保存 ETag/Last-Modified 和解析后的列表，用于条件请求；
+    超过有效期的条目丢弃，超出条目数或容量时按最近最少使用淘汰
+    """
+
+    def __init__(self, cache_dir=LISTING_CACHE_DIR, ttl=LISTING_CACHE_TTL,
+                 max_entries=LISTING_CACHE_MAX_ENTRIES, max_bytes=LISTING_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory = {}  # url -> 条目，避免重复读取和解析json
+        self._lock = threading.Lock()
+
+    def _entry_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + ".json")
+
+    def get(self, url):
+        """
+        获取缓存条目
+        :return: dict(etag, last_modified, stored_at, rows)，不存在或已过期时为 None
+        """
+        path = self._entry_path(url)
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is None:
+                try:
+                    with open(path, 'r', encoding='utf-8') as file:
+                        entry = json.load(file)
+                except (OSError, ValueError):
+                    return None
+                if entry.get("version") != LISTING_CACHE_VERSION or entry.get("url") != url:
+                    return None
+                entry["rows"] = [ListingEntry(*row) for row in entry["rows"]]
+                self._memory[url] = entry
+
+            if time.time() - entry["stored_at"] > self.ttl:
+                self._memory.pop(url, None)
+                if os.path.isfile(path):
+                    os.remove(path)
+                return None
+            return entry
+
+    def put(self, url, etag, last_modified, rows):
+        """保存目录列表"""
+        entry = {
+            "version": LISTING_CACHE_VERSION,
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "rows": rows,
+        }
+        path = self._entry_path(url)
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(entry, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._memory[url] = entry
+            self._evict()
+        return entry
+
+    def touch(self, url):
+        """服务器返回304时刷新条目的有效期和最近使用时间"""
+        entry = self.get(url)
+        if entry is None:
+            return None
+        return self.put(url, entry["etag"], entry["last_modified"], entry["rows"])
+
+    def _evict(self):
+        """按文件修改时间（即最近使用时间）淘汰最旧的条目"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        while files and (len(files) > self.max_entries or total > self.max_bytes):
+            _, size, path = files.pop(0)
+            os.remove(path)
+            total -= size
+            for url, entry in list(self._memory.items()):
+                if self._entry_path(url) == path:
+                    del self._memory[url]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if os.path.isdir(self.cache_dir):
+                for name in os.listdir(self.cache_dir):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+listing_cache = ListingCache()
+
+
+def get_listing(url, use_cache=True):
+    """
+    获取服务器目录列表
+    有缓存时发送 If-None-Match/If-Modified-Since 条件请求，服务器返回304则直接使用缓存的解析结果
+    :param url: 目录地址
+    :param use_cache: 是否使用缓存
+    :return: ListingEntry 列表，顺序与页面一致
+    """
+    entry = listing_cache.get(url) if use_cache else None
+    headers = {}
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with get_http_session().get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 304 and entry is not None:
+            listing_cache.touch(url)
+            return entry["rows"]
+        # 服务器错误不能当作空目录处理
+        if response.status_code != 200:
+            response.raise_for_status()
+
+        # 边下载边解析，不构建完整的DOM
+        rows = list(iter_listing(_iter_text(response)))
+
+    if use_cache and response.status_code == 200:
+        listing_cache.put(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), rows)
+    return rows
+
+
+def _iter_text(response):
+    """按块读取响应并增量解码为文本"""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size=LISTING_CHUNK_SIZE):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+_TBODY_START_RE = re.compile(r'<tbody[^>]*>', re.I)
+_TBODY_END_RE = re.compile(r'</tbody\s*>', re.I)
+_TR_END_RE = re.compile(r'</tr\s*>', re.I)
+_TD_RE = re.compile(r'<td[^>]*>(.*?)</td\s*>', re.I | re.S)
+_HREF_RE = re.compile(r'<a\s[^>]*?href\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.I | re.S)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+
+def iter_listing(chunks):
+    """
+    流式解析服务器目录页面（第一个tbody中的表格行）
+    :param chunks: 页面文本块的可迭代对象
+    :return: 逐行产生 ListingEntry(链接, 大小, 修改时间)
+    """
+    buffer = ""
+    in_body = False
+    for chunk in chunks:
+        buffer += chunk
+        if not in_body:
+            match = _TBODY_START_RE.search(buffer)
+            if not match:
+                # 从最后一个 '<' 开始保留，防止标签被切断在两个块之间
+                start = buffer.rfind('<')
+                buffer = buffer[start:] if start >= 0 else ""
+                continue
+            buffer = buffer[match.end():]
+            in_body = True
+
+        body_end = _TBODY_END_RE.search(buffer)
+        limit = body_end.start() if body_end else len(buffer)
+        pos = 0
+        while True:
+            row_end = _TR_END_RE.search(buffer, pos, limit)
+            if not row_end:
+                break
+            entry = _parse_listing_row(buffer[pos:row_end.start()])
+            pos = row_end.end()
+            if entry is not None:
+                yield entry
+
+        if body_end:
+            return
+        buffer = buffer[pos:]
+
+
+def _parse_listing_row(row):
+    cells = _TD_RE.findall(row)
+    if not cells:
+        return None
+    match = _HREF_RE.search(cells[0])
+    if not match:
+        return None
+    href = html.unescape(match.group(1) if match.group(1) is not None else match.group(2))
+    size = html.unescape(_TAG_RE.sub('', cells[1])).strip() if len(cells) > 1 else ""
+    mtime = html.unescape(_TAG_RE.sub('', cells[2])).strip() if len(cells) > 2 else ""
+    return ListingEntry(href, size, mtime)
+
+
+# ICC固件型号，按前缀匹配，较长的型号在前（LITE.B 先于 LITE）
+ICC_MODELS = ['LITE.B', 'LITE', 'TURBO', 'PRO.B', 'PRO', 'EVO']
+# 按目录中固定行号取最新版本的软件类型
+POSITIONAL_LATEST = {'ICM': 1, 'VP': 2}
+
+_VERSION_RE = re.compile(r'v\d+\.\d+')
+_BUILD_DATE_RE = re.compile(r'(20\d{2})(\d{2})(\d{2})')
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """服务器目录中的一个构建产物"""
+    filename: str
+    product: str
+    model: Optional[str] = None
+    edition: Optional[str] = None
+    version: Optional[str] = None
+    branch: Optional[str] = None
+    build_date: Optional[str] = None
+    size: str = ""
+    mtime: str = ""
+
+
+def parse_artifact(entry, soft_type, edition):
+    """
+    解析目录中的一行为构建产物
+    :param entry: ListingEntry
+    :param soft_type: 软件类型，决定文件名的解析规则
+    :param edition: 目录对应的软件版本 Debug / Release
+    :return: Artifact，不属于该软件类型/版本的行返回 None
+    """
+    filename = entry.href
+    model = version = branch = None
+    artifact_edition = edition.lower() if edition else None
+
+    if soft_type == 'ICS':
+        if not filename.startswith("ICSStudio"):
+            return None
+        if edition == "Release":
+            version = filename[10:14]
+        else:
+            if "refs" in filename:
+                branch = "refs"
+            match = _VERSION_RE.search(filename)
+            version = match.group() if match else None
+    elif soft_type == 'ICC':
+        model = next((m for m in ICC_MODELS if filename[4:4 + len(m)] == m), None)
+        if model is None:
+            return None
+        if edition == "Release":
+            version = filename[-16:-12]
+        else:
+            # jcywong add 2023/11/13  解决固件firmwares下载debug中包含release和debug问题
+            if filename[-9:-4] != "debug":
+                return None
+            match = _VERSION_RE.search(filename)
+            version = match.group() if match else None
+    elif soft_type == 'ICP':
+        parts = filename.split('.')
+        if len(parts) < 3:
+            return None
+        branch = parts[-3]
+        artifact_edition = parts[-2]
+        if artifact_edition != edition.lower():
+            return None
+    elif soft_type == 'ICF':
+        if not filename.startswith('ICF'):
+            return None
+        parts = filename.split('.')
+        name_parts = parts[0].split('-')
+        if len(parts) < 3 or len(name_parts) < 2:
+            return None
+        model = name_parts[1]
+    elif soft_type not in POSITIONAL_LATEST:
+        return None
+
+    match = _BUILD_DATE_RE.search(filename)
+    build_date = f"{match.group(1)}-{match.group(2)}-{match.group(3)}" if match else entry.mtime
+    return Artifact(filename, soft_type, model, artifact_edition, version, branch, build_date,
+                    entry.size, entry.mtime)
+
+
+class ArtifactCatalog:
+    """
+    一个目录列表解析后的构建产物目录
+    按 (型号, 版本, 分支) 建立索引，目录页面按时间倒序排列，索引中保留每个键的第一个（最新）产物
+    """
+
+    def __init__(self, soft_type, edition, rows):
+        self.soft_type = soft_type
+        self.edition = edition
+        # ICS/ICC 的 Release 才按版本号区分，ICC/ICF 按型号区分
+        self.by_version = edition == "Release" and soft_type in ('ICS', 'ICC')
+        self.by_model = soft_type in ('ICC', 'ICF')
+        self.default_branch = "master" if soft_type == 'ICP' else None
+
+        if soft_type in POSITIONAL_LATEST:
+            index = POSITIONAL_LATEST[soft_type]
+            rows = rows[index:index + 1]
+        self.artifacts = [artifact for artifact in (parse_artifact(row, soft_type, edition) for row in rows)
+                          if artifact is not None]
+
+        self._index = {}
+        for artifact in self.artifacts:
+            model = artifact.model if self.by_model else None
+            # 按版本号区分时只能按版本号查找，与逐行匹配的结果一致
+            version = artifact.version if self.by_version else None
+            self._index.setdefault((model, version, artifact.branch), artifact)
+
+    def latest(self, model=None, version=None, branch=None):
+        """
+        查找最新的构建产物
+        :param model: 型号，仅 ICC/ICF 有效
+        :param version: 版本号，仅 ICS/ICC 的 Release 有效
+        :param branch: 分支，默认主分支
+        :return: Artifact 或 None
+        """
+        key = (model if self.by_model else None,
+               version if self.by_version else None,
+               branch if branch is not None else self.default_branch)
+        return self._index.get(key)
+
+    def newest(self):
+        """
+        主分支上最新的构建产物，不区分型号和版本号
+        :return: Artifact 或 None
+        """
+        for artifact in self.artifacts:
+            if artifact.branch == self.default_branch:
+                return artifact
+        return None
+
+    def latest_by_model(self):
+        """
+        每个型号最新的构建产物，按目录中的顺序排列
+        :return: {型号: Artifact}
+        """
+        result = {}
+        for artifact in self.artifacts:
+            if artifact.branch == self.default_branch:
+                result.setdefault(artifact.model, artifact)
+        return result
+
+    def __iter__(self):
+        return iter(self.artifacts)
+
+    def __len__(self):
+        return len(self.artifacts)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_artifact_catalog(soft_type='ICS', edition="Debug", network="LAN"):
+    """
+    获取软件类型对应目录的构建产物目录
+    目录列表未变化（缓存命中304）时直接复用已建立的索引
+    :return: ArtifactCatalog
+    """
+    if network == NETWORK_AUTO:
+        return mirror_selector.call(lambda mirror: get_artifact_catalog(soft_type, edition, mirror))
+
+    url = get_server_url(soft_type, edition, network)
+    return _build_catalog(url, soft_type, edition, get_listing(url))
+
+
+def _build_catalog(url, soft_type, edition, rows):
+    """由目录列表建立构建产物目录，同一个列表对象只建立一次"""
+    key = (url, soft_type, edition)
+    with _catalogs_lock:
+        cached = _catalogs.get(key)
+        if cached is not None and cached[0] is rows:
+            return cached[1]
+    catalog = ArtifactCatalog(soft_type, edition, rows)
+    with _catalogs_lock:
+        _catalogs[key] = (rows, catalog)
+    return catalog
+
+
 def get_latest_filename(soft_type='ICS', edition="Debug", network="LAN", model=None, ver=None, ):
     """
     得到最新的文件名
@@ -139,132 +1439,730 @@ def get_latest_filename(soft_type='ICS', edition="Debug", network="LAN", model=N
     :param ver: release 版本号
     :return:
     """
-    # 发送 HTTP 请求获取页面内容
-    file_server = get_server_url(soft_type, edition, network)
+    if soft_type not in ('ICS', 'ICC', 'ICP', 'ICF') and soft_type not in POSITIONAL_LATEST:
+        get_server_url(soft_type, edition, network)  # 参数校验
+        return False
 
     try:
-        response = requests.get(file_server)
-        # 解析 HTML 内容
-        soup = BeautifulSoup(response.text, 'html.parser')
-        tbody = soup.select('tbody')
+        catalog = get_artifact_catalog(soft_type, edition, network)
     except requests.exceptions.ConnectTimeout:
         print("网络错误")
         return False
 
-    if soft_type == 'ICS' and edition == "Debug":
-        tr_list = tbody[0].select('tr')
-        for tr in tr_list:
-            first_td = tr.select('td')[0]
-            a_tag = first_td.find('a')
-            filename = a_tag.get("href")
-            if "ICSStudio" not in filename:
-                continue
-            if  "refs" in filename:
-                continue
-            if not filename.startswith("ICSStudio"):
-                continue
-            return filename
-    elif soft_type == 'ICC' and edition == "Debug":
-        tr_list = tbody[0].select('tr')
-        for tr in tr_list:
-            first_td = tr.select('td')[0]
-            a_tag = first_td.find('a')
-            filename = a_tag.get("href")
-            if filename[-9:-4] == "debug":  # jcywong add 2023/11/13  解决固件firmwares下载debug中包含release和debug问题
-                if model == 'LITE' and filename[4:10] != 'LITE.B':
-                    if model == filename[4:8]:
-                        return filename
-                elif model == 'LITE.B':
-                    if filename[4:10] == model:
-                        return filename
-                elif model == 'TURBO':
-                    if model == filename[4:9]:
-                        return filename
-                elif model == 'PRO':
-                    if model == filename[4:7] and filename[4:9] != 'PRO.B':
-                        return filename
-                elif model == 'PRO.B':  # jcywong add 2024/1/31
-                    if model == filename[4:9]:
-                        return filename
-                elif model == 'EVO':  # jcywong add 2023/12/12
-                    if model == filename[4:7]:
-                        return filename
-    elif soft_type == 'ICS' and edition == "Release":
-        tr_list = tbody[0].select('tr')
-        for tr in tr_list:
-            first_td = tr.select('td')[0]
-            a_tag = first_td.find('a')
-            filename = a_tag.get("href")
-            if filename[:9] == "ICSStudio" and filename[10:14] == ver:
-                return filename
-    elif soft_type == 'ICC' and edition == "Release":
-        tr_list = tbody[0].select('tr')
-        for tr in tr_list:
-            first_td = tr.select('td')[0]
-            a_tag = first_td.find('a')
-            filename = a_tag.get("href")
-            if model == 'LITE':
-                if model == filename[4:8] and filename[4:10] != 'LITE.B' and filename[-16:-12] == ver:
-                    return filename
-            elif model == 'LITE.B':
-                if model == filename[4:10] and filename[-16:-12] == ver:
-                    return filename
-            elif model == 'TURBO':
-                if model == filename[4:9] and filename[-16:-12] == ver:
-                    return filename
-            elif model == 'PRO':
-                if model == filename[4:7] and filename[4:9] != 'PRO.B' and filename[-16:-12] == ver:
-                    return filename
-            elif model == 'PRO.B':  # jcywong add 2024/4/2
-                if model == filename[4:9] and filename[-16:-12] == ver:
-                    return filename
-            elif model == 'EVO':  # jcywong add 2024/4/2
-                if model == filename[4:7] and filename[-16:-12] == ver:
-                    return filename
-    elif soft_type == 'ICM':
-        tbody = soup.select('tbody')
-        second_tr = tbody[0].select('tr')[1]
-        first_td = second_tr.select('td')[0]
-        a_tag = first_td.find('a')
-        filename = a_tag.get("href")
-        return filename
-    elif soft_type == 'VP':
-        tbody = soup.select('tbody')
-        second_tr = tbody[0].select('tr')[2]
-        first_td = second_tr.select('td')[0]
-        a_tag = first_td.find('a')
-        filename = a_tag.get("href")
-        return filename
-    elif soft_type == 'ICP':
-        tr_list = tbody[0].select('tr')
-        for tr in tr_list:
-            first_td = tr.select('td')[0]
-            a_tag = first_td.find('a')
-            filename = a_tag.get("href")
-            parts = filename.split('.')
-            if len(parts) < 3:
-                continue
-            master_part = parts[-3]
-            edition_part = parts[-2]
-            if master_part != "master":
-                continue
-            if edition_part == edition.lower():
-                return filename
-    elif soft_type == 'ICF':
-        tr_list = tbody[0].select('tr')
-        for tr in tr_list:
-            first_td = tr.select('td')[0]
-            a_tag = first_td.find('a')
-            filename = a_tag.get("href")
-            if not filename.startswith('ICF'):
+    artifact = catalog.latest(model=model, version=ver)
+    return artifact.filename if artifact else None
+
+
+# 最新版本总览：包含的软件类型、并发获取目录列表的数量
+DASHBOARD_SOFT_TYPES = ['ICS', 'ICC', 'ICM', 'AENTR', 'BAENTR', 'VP', 'ICP', 'ICF']
+LISTING_CONCURRENCY = 8
+
+
+def fetch_listings(urls, concurrency=LISTING_CONCURRENCY, use_cache=True):
+    """
+    用 asyncio 并发获取多个目录列表，重复的url只请求一次
+    每个请求通过 run_in_executor 在线程池中执行，使用共享的连接池和目录缓存；
+    并发数由线程池大小限制，同时进行的请求数不超过 concurrency
+    :param urls: 目录地址列表
+    :param concurrency: 最大并发数
+    :param use_cache: 是否使用目录缓存
+    :return: {url: ListingEntry 列表，失败时为异常}
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(urls))) as executor:
+        return asyncio.run(_gather_listings(urls, use_cache, executor))
+
+
+async def _gather_listings(urls, use_cache, executor):
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(executor, get_listing, url, use_cache) for url in urls),
+                                   return_exceptions=True)
+    return dict(zip(urls, results))
+
+
+def get_latest_builds(soft_types=None, edition="Debug", network="LAN", concurrency=LISTING_CONCURRENCY):
+    """
+    最新版本总览：并发获取所有软件类型的目录列表后查找最新版本，耗时约为一次请求
+    ICC/ICF 按型号各返回一行；没有解析规则的软件类型（AENTR、BAENTR）返回目录中最新的文件
+    :param soft_types: 软件类型列表，None 时为 DASHBOARD_SOFT_TYPES
+    :param edition: 软件版本 Debug / Release
+    :param network: 内网LAN 外网Internet 自动选择Auto
+    :param concurrency: 最大并发数
+    :return: [dict(soft_type, model, filename, build_date, size, url, error)]
+    """
+    if network == NETWORK_AUTO:
+        network = mirror_selector.select()
+    soft_types = soft_types or DASHBOARD_SOFT_TYPES
+    urls = {soft_type: get_server_url(soft_type, edition, network) for soft_type in soft_types}
+    listings = fetch_listings(urls.values(), concurrency)
+
+    builds = []
+    for soft_type in soft_types:
+        url = urls[soft_type]
+        build = {"soft_type": soft_type, "model": None, "filename": None, "build_date": None, "size": None,
+                 "url": url, "error": None}
+        rows = listings[url]
+        if isinstance(rows, Exception):
+            builds.append({**build, "error": rows})
+            continue
+
+        if soft_type not in ('ICS', 'ICC', 'ICP', 'ICF') and soft_type not in POSITIONAL_LATEST:
+            # 目录按时间倒序排列，第一行为上级目录
+            if len(rows) > 1:
+                build.update(filename=rows[1].href, build_date=rows[1].mtime, size=rows[1].size)
+            builds.append(build)
+            continue
+
+        catalog = _build_catalog(url, soft_type, edition, rows)
+        artifacts = catalog.latest_by_model() if catalog.by_model else {None: catalog.newest()}
+        for model, artifact in (artifacts or {None: None}).items():
+            if artifact is None:
+                builds.append({**build, "model": model})
+            else:
+                builds.append({**build, "model": model, "filename": artifact.filename,
+                               "build_date": artifact.build_date, "size": artifact.size})
+    return builds
+
+
+# 本地构建产物仓库：保存路径下的目录名、默认磁盘配额（字节）
+ARTIFACT_STORE_DIR = ".store"
+ARTIFACT_STORE_QUOTA = 20 * 1024 ** 3
+
+
+class ArtifactStore:
+    """
+    按内容哈希（SHA-256）保存下载的压缩包，索引记录每个对象的文件名、大小、解压目录和最近使用时间
+    同样的文件名再次请求时直接使用仓库中的对象；压缩包和解压目录的总大小超过配额时，
+    按最近最少使用淘汰压缩包及其解压目录
+    """
+
+    def __init__(self, root, quota=ARTIFACT_STORE_QUOTA):
+        self.root = root
+        self.quota = quota
+        self.objects_dir = os.path.join(root, "objects")
+        self.incoming_dir = os.path.join(root, "incoming")
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.RLock()
+        self._name_locks = {}
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return {"objects": {}, "names": {}}
+
+        # 丢弃对象文件已被删除的条目
+        for digest, entry in list(index["objects"].items()):
+            if not os.path.isfile(self._object_path(digest, entry)):
+                del index["objects"][digest]
+        index["names"] = {name: digest for name, digest in index["names"].items() if digest in index["objects"]}
+        return index
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self._index, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def _object_path(self, digest, entry):
+        return os.path.join(self.objects_dir, digest[:2], digest + entry["ext"])
+
+    def object_path(self, digest):
+        """对象文件路径"""
+        with self._lock:
+            return self._object_path(digest, self._index["objects"][digest])
+
+    def name_lock(self, name):
+        """同一文件名的下载/解压互斥锁"""
+        with self._lock:
+            return self._name_locks.setdefault(name, threading.Lock())
+
+    def lookup(self, name):
+        """
+        按文件名查找已保存的对象
+        :return: 内容哈希，不存在时为 None
+        """
+        with self._lock:
+            digest = self._index["names"].get(name)
+            if digest is None or digest not in self._index["objects"]:
+                return None
+            if not os.path.isfile(self.object_path(digest)):
+                self._forget(digest)
+                self._save_index()
+                return None
+            return digest
+
+    def link(self, digest, name):
+        """
+        内容相同的对象已在仓库中时，直接记录文件名，不需要下载
+        :return: 是否已记录
+        """
+        with self._lock:
+            entry = self._index["objects"].get(digest)
+            if entry is None or not os.path.isfile(self._object_path(digest, entry)):
+                return False
+            if name not in entry["names"]:
+                entry["names"].append(name)
+            self._index["names"][name] = digest
+            entry["last_used"] = time.time()
+            self._save_index()
+            return True
+
+    def unlink(self, name):
+        """移除文件名的记录，对象本身保留（可能仍被其他文件名使用），由配额淘汰"""
+        with self._lock:
+            digest = self._index["names"].pop(name, None)
+            entry = self._index["objects"].get(digest)
+            if entry is not None and name in entry["names"]:
+                entry["names"].remove(name)
+            self._save_index()
+
+    def add(self, file_path, name, digest=None):
+        """
+        将下载完成的文件移入仓库
+        :param file_path: 文件路径，移入后原文件不再存在
+        :param name: 服务器上的文件名
+        :param digest: 已知的 SHA-256，None 时读取文件计算
+        :return: 内容哈希
+        """
+        if digest is None:
+            digest = file_sha256(file_path)
+        ext = os.path.splitext(name)[1]
+        with self._lock:
+            entry = self._index["objects"].get(digest)
+            if entry is None:
+                entry = {"size": os.path.getsize(file_path), "ext": ext, "names": [], "extracted": {},
+                         "last_used": time.time()}
+            dest = self._object_path(digest, entry)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if os.path.isfile(dest):
+                os.remove(file_path)  # 内容相同的对象已存在，只记录文件名
+            else:
+                os.replace(file_path, dest)
+
+            self._index["objects"][digest] = entry
+            if name not in entry["names"]:
+                entry["names"].append(name)
+            self._index["names"][name] = digest
+            entry["last_used"] = time.time()
+            self._evict(keep=(digest,))
+            self._save_index()
+        return digest
+
+    def extract(self, digest, target_path, workers=None, incremental=INCREMENTAL_EXTRACT):
+        """
+        解压对象到目标目录并记录，供淘汰时一并删除
+        :param incremental: 增量解压，复用同一产品上一次解压目录中未变化的文件
+        :return: 本次是否进行了解压，目标目录已存在时为 False
+        """
+        extracted = False
+        with self.name_lock(target_path):
+            if not os.path.isdir(target_path):
+                # 先解压到临时目录，解压失败时不会留下不完整的目录
+                tmp_path = target_path + ".extracting"
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                previous_path = find_previous_extraction(target_path) if incremental else None
+                extract_archive(self.object_path(digest), tmp_path, workers, previous_path=previous_path)
+                os.replace(tmp_path, target_path)
+                extracted = True
+        with self._lock:
+            entry = self._index["objects"].get(digest)
+            if entry is not None:
+                entry["extracted"][target_path] = 0
+                # 增量解压硬链接了上一次构建的文件，同一产品其他目录的占用随之减少，一并重新计算
+                self._refresh_extracted([target_path])
+                entry["last_used"] = time.time()
+                self._evict(keep=(digest,))
+                self._save_index()
+        return extracted
+
+    def touch(self, digest):
+        """更新最近使用时间"""
+        with self._lock:
+            entry = self._index["objects"].get(digest)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                self._save_index()
+
+    def usage(self):
+        """压缩包和解压目录占用的总字节数"""
+        with self._lock:
+            return sum(entry["size"] + sum(entry["extracted"].values()) for entry in self._index["objects"].values())
+
+    def entries(self):
+        """索引中的所有对象，按最近使用时间从新到旧排列"""
+        with self._lock:
+            return sorted(({"digest": digest, **entry} for digest, entry in self._index["objects"].items()),
+                          key=lambda entry: entry["last_used"], reverse=True)
+
+    def _forget(self, digest):
+        entry = self._index["objects"].pop(digest, None)
+        if entry is None:
+            return
+        for name in entry["names"]:
+            if self._index["names"].get(name) == digest:
+                del self._index["names"][name]
+
+    def _evict(self, keep=()):
+        """超出配额时按最近使用时间从旧到新删除对象及其解压目录"""
+        total = self.usage()
+        if total <= self.quota:
+            return
+        for digest, entry in sorted(self._index["objects"].items(), key=lambda item: item[1]["last_used"]):
+            if digest in keep:
                 continue
-            parts = filename.split('.')
-            if len(parts) < 3:
+            object_path = self._object_path(digest, entry)
+            if os.path.isfile(object_path):
+                os.remove(object_path)
+            for extracted_path in entry["extracted"]:
+                shutil.rmtree(extracted_path, ignore_errors=True)
+            print(f"{', '.join(entry['names'])}:超出缓存配额，已删除")
+            self._forget(digest)
+            # 与删除的目录共享硬链接的同一产品目录，链接数减少后占用随之增加，需要重新计算
+            self._refresh_extracted(entry["extracted"])
+            total = self.usage()
+            if total <= self.quota:
+                break
+
+    def _refresh_extracted(self, paths):
+        """重新计算与给定目录属于同一产品的解压目录大小"""
+        keys = {(os.path.dirname(os.path.normpath(path)), _build_key(os.path.basename(os.path.normpath(path))))
+                for path in paths}
+        for entry in self._index["objects"].values():
+            for path in entry["extracted"]:
+                parent, name = os.path.split(os.path.normpath(path))
+                if (parent, _build_key(name)) in keys:
+                    entry["extracted"][path] = _tree_size(path)
+
+
+_artifact_stores = {}
+_artifact_stores_lock = threading.Lock()
+
+
+def get_artifact_store(save_path, quota=ARTIFACT_STORE_QUOTA):
+    """
+    获取保存路径对应的构建产物仓库
+    :param save_path: 保存路径
+    :param quota: 磁盘配额（字节）
+    :return: ArtifactStore
+    """
+    root = os.path.join(save_path, ARTIFACT_STORE_DIR)
+    with _artifact_stores_lock:
+        store = _artifact_stores.get(root)
+        if store is None:
+            store = _artifact_stores[root] = ArtifactStore(root, quota)
+        store.quota = quota
+    return store
+
+
+def fetch_artifact(store, name, soft_type='ICS', edition="Debug", network="LAN", progress_callback=None):
+    """
+    从仓库获取文件，仓库中没有或与服务器校验值不一致时下载后存入仓库
+    :param store: ArtifactStore
+    :param name: 文件名
+    :return: (内容哈希, 是否来自仓库)
+    """
+    with store.name_lock(name):
+        expected = get_server_checksum(name, soft_type, edition, network)
+        digest = store.lookup(name)
+        if digest is not None and expected is not None and digest != expected:
+            # 服务器上的同名文件已更新，或仓库中的对象与服务器不一致
+            print(f"{name}:本地仓库中的文件与服务器校验值不一致，重新下载")
+            store.unlink(name)
+            digest = None
+        if digest is not None:
+            store.touch(digest)
+            print(f"{name}:已在本地仓库中，不进行下载")
+            return digest, True
+
+        if expected is not None and store.link(expected, name):
+            print(f"{name}:仓库中已有内容相同的文件，不进行下载")
+            return expected, True
+
+        os.makedirs(store.incoming_dir, exist_ok=True)
+        incoming_path = os.path.join(store.incoming_dir, name)
+        if os.path.isfile(incoming_path):
+            os.remove(incoming_path)
+        digest = download_file(name, store.incoming_dir, soft_type=soft_type, edition=edition, network=network,
+                               progress_callback=progress_callback, write_checksum=False)
+        if not digest:
+            raise FileNotFoundError(f"{name}:下载失败")
+        # 使用下载时计算的 SHA-256，不再重新读取文件
+        return store.add(incoming_path, name, digest), False
+
+
+def file_sha256(file_path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """计算文件的 SHA-256"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _tree_size(path):
+    """
+    目录下所有文件的总字节数
+    增量解压的目录与上一次构建硬链接共享未变化的文件，有多个链接的文件按链接数均分，
+    各目录的大小相加即为实际占用，不会重复计算
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                stat = os.lstat(os.path.join(root, file))
+            except OSError:
                 continue
-            if parts[0].split('-')[1] == model:
-                return filename
-    else:
-        return False
+            total += stat.st_size / max(stat.st_nlink, 1)
+    return round(total)
+
+
+# 批量下载默认并发数：下载线程数、解压线程数
+BATCH_DOWNLOAD_WORKERS = 3
+BATCH_EXTRACT_WORKERS = 2
+
+
+def resolve_latest(soft_type='ICS', edition="Debug", network="LAN", model=None, ver=None):
+    """
+    查找最新版本的文件名，找不到时抛出 FileNotFoundError
+    :return: 文件名
+    """
+    name = get_latest_filename(soft_type=soft_type, edition=edition, network=network, model=model, ver=ver)
+    if not name:
+        desc = " ".join(part for part in (soft_type, edition, model, ver) if part and part.strip())
+        raise FileNotFoundError(f"{desc}:未找到最新版本")
+    return name
+
+
+class DownloadPipeline:
+    """
+    分阶段的批量下载流水线：查找 → 下载 → 解压
+    下载线程完成一个文件后放入解压队列并立即开始下一个下载，解压由独立的线程处理，
+    网络和磁盘同时工作。每个任务记录各阶段耗时，结束后汇总各阶段的总耗时和利用率
+    """
+    STAGES = ("resolve", "download", "wait", "extract")
+
+    def __init__(self, save_path, network="LAN", download_workers=BATCH_DOWNLOAD_WORKERS,
+                 extract_workers=BATCH_EXTRACT_WORKERS, progress_callback=None, result_callback=None,
+                 stage_callback=None, store=None):
+        """
+        :param save_path: 保存路径
+        :param network: 内网LAN 外网Internet
+        :param download_workers: 下载线程数
+        :param extract_workers: 解压线程数
+        :param progress_callback: 进度回调 progress_callback(key, 已下载字节数, 总字节数)
+        :param result_callback: 每个任务完成时回调 result_callback(key, result)
+        :param stage_callback: 任务进入新阶段时回调 stage_callback(key, stage)
+        :param store: ArtifactStore，指定时从仓库获取文件，下载的文件存入仓库
+        """
+        self.save_path = save_path
+        self.store = store
+        self.network = network
+        self.download_workers = max(1, download_workers)
+        self.extract_workers = max(1, extract_workers)
+        self.progress_callback = progress_callback
+        self.result_callback = result_callback
+        self.stage_callback = stage_callback
+        self.results = {}
+        self.stats = {}
+        self._extract_queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def run(self, jobs):
+        """
+        执行所有任务，阻塞到全部完成
+        :param jobs: 任务列表，每项为 dict(key, soft_type, edition, model, ver)，key 缺省为 soft_type
+        :return: {key: dict(name, error, elapsed, timings)}
+        """
+        begin = time.perf_counter()
+        extractors = [threading.Thread(target=self._extract_worker, daemon=True)
+                      for _ in range(self.extract_workers)]
+        for extractor in extractors:
+            extractor.start()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.download_workers, len(jobs) or 1))) as executor:
+            for job in jobs:
+                executor.submit(self._download_job, job, begin)
+
+        for _ in extractors:
+            self._extract_queue.put(None)
+        for extractor in extractors:
+            extractor.join()
+
+        self.stats = self._summarize(time.perf_counter() - begin)
+        return self.results
+
+    def _notify_stage(self, key, stage):
+        if self.stage_callback:
+            self.stage_callback(key, stage)
+
+    def _download_job(self, job, begin):
+        key = job.get("key", job["soft_type"])
+        result = {"name": None, "error": None, "elapsed": 0.0, "timings": dict.fromkeys(self.STAGES, 0.0)}
+        timings = result["timings"]
+        try:
+            self._notify_stage(key, "resolve")
+            start = time.perf_counter()
+            result["name"] = resolve_latest(job["soft_type"], job.get("edition", "Debug"), self.network,
+                                            job.get("model"), job.get("ver"))
+            timings["resolve"] = time.perf_counter() - start
+
+            self._notify_stage(key, "download")
+            start = time.perf_counter()
+            progress_callback = (lambda done, total: self.progress_callback(key, done, total)) \
+                if self.progress_callback else None
+            if self.store is not None:
+                result["digest"], result["cached"] = fetch_artifact(
+                    self.store, result["name"], job["soft_type"], job.get("edition", "Debug"), self.network,
+                    progress_callback)
+            else:
+                try:
+                    download_file(result["name"], self.save_path, soft_type=job["soft_type"],
+                                  edition=job.get("edition", "Debug"), network=self.network,
+                                  progress_callback=progress_callback)
+                except FileExistsError:
+                    pass
+            timings["download"] = time.perf_counter() - start
+        except Exception as e:
+            print(f"{key}: 批量下载失败: {e}")
+            result["error"] = e
+            self._finish(key, result, begin)
+            return
+
+        self._notify_stage(key, "wait")
+        self._extract_queue.put((key, result, time.perf_counter(), begin))
+
+    def _extract_worker(self):
+        while True:
+            item = self._extract_queue.get()
+            if item is None:
+                return
+            key, result, queued_at, begin = item
+            timings = result["timings"]
+            timings["wait"] = time.perf_counter() - queued_at
+
+            self._notify_stage(key, "extract")
+            start = time.perf_counter()
+            try:
+                if self.store is not None:
+                    self.store.extract(result["digest"], os.path.join(self.save_path, result["name"][:-4]))
+                else:
+                    unzip_file(self.save_path, result["name"])
+            except FileExistsError:
+                pass
+            except Exception as e:
+                print(f"{key}: 解压失败: {e}")
+                result["error"] = e
+            timings["extract"] = time.perf_counter() - start
+            self._finish(key, result, begin)
+
+    def _finish(self, key, result, begin):
+        result["elapsed"] = sum(result["timings"].values())
+        with self._lock:
+            self.results[key] = result
+        if self.result_callback:
+            self.result_callback(key, result)
+
+    def _summarize(self, wall):
+        """
+        汇总各阶段耗时
+        utilization 为阶段总耗时 / (线程数 × 总耗时)，最接近1的阶段即为瓶颈
+        """
+        workers = {"resolve": self.download_workers, "download": self.download_workers,
+                   "wait": self.extract_workers, "extract": self.extract_workers}
+        stages = {}
+        for stage in self.STAGES:
+            values = [result["timings"][stage] for result in self.results.values()]
+            total = sum(values)
+            stages[stage] = {
+                "total": total,
+                "max": max(values, default=0.0),
+                "utilization": total / (workers[stage] * wall) if wall else 0.0,
+            }
+        # 查找和下载占用同一组线程
+        download_busy = stages["resolve"]["utilization"] + stages["download"]["utilization"]
+        bottleneck = "download" if download_busy >= stages["extract"]["utilization"] else "extract"
+        return {"wall": wall, "stages": stages, "bottleneck": bottleneck}
+
+    def report(self):
+        """各阶段耗时的文本报告"""
+        if not self.stats:
+            return ""
+        lines = [f"总耗时 {self.stats['wall']:.1f}s，瓶颈阶段：{self.stats['bottleneck']}"]
+        for stage, stat in self.stats["stages"].items():
+            lines.append(f"{stage:>8}: 合计 {stat['total']:.1f}s，最长 {stat['max']:.1f}s，"
+                         f"利用率 {stat['utilization'] * 100:.0f}%")
+        return "\n".join(lines)
+
+
+def batch_download(jobs, save_path, network="LAN", max_workers=BATCH_DOWNLOAD_WORKERS,
+                   progress_callback=None, result_callback=None, extract_workers=BATCH_EXTRACT_WORKERS,
+                   stage_callback=None, stats_callback=None, store=None):
+    """
+    并发下载多个软件的最新版本并解压，单个软件失败不影响其他软件
+    下载和解压分阶段进行，见 DownloadPipeline
+    :param jobs: 任务列表，每项为 dict(key, soft_type, edition, model, ver)，key 缺省为 soft_type
+    :param save_path: 保存路径
+    :param network: 内网LAN 外网Internet
+    :param max_workers: 最大并发下载数
+    :param progress_callback: 进度回调 progress_callback(key, 已下载字节数, 总字节数)
+    :param result_callback: 每个任务完成时回调 result_callback(key, result)
+    :param extract_workers: 解压线程数
+    :param stage_callback: 任务进入新阶段时回调 stage_callback(key, stage)
+    :param stats_callback: 全部完成后回调 stats_callback(pipeline)，可通过 pipeline.report() 获取阶段耗时
+    :param store: ArtifactStore，指定时从仓库获取文件，下载的文件存入仓库
+    :return: {key: dict(name, error, elapsed, timings)}
+    """
+    pipeline = DownloadPipeline(save_path, network, max_workers, extract_workers,
+                                progress_callback, result_callback, stage_callback, store)
+    results = pipeline.run(jobs)
+    print(pipeline.report())
+    if stats_callback:
+        stats_callback(pipeline)
+    return results
+
+
+# 后台预取：检查间隔（秒）、没有新版本或检查失败时退避的最大间隔（秒）、同时下载的数量
+PREFETCH_INTERVAL = 10 * 60
+PREFETCH_MAX_INTERVAL = 2 * 3600
+PREFETCH_WORKERS = 1
+
+
+class PrefetchScheduler:
+    """
+    后台预取新构建
+    后台线程按间隔检查各软件的最新版本，仓库中没有时下载并解压到保存路径，
+    之后点击下载直接使用仓库中的文件。目录列表使用条件请求，服务器没有变化时检查几乎没有开销。
+    有新版本时恢复初始间隔，没有新版本或检查失败时间隔加倍，最长为 max_interval；
+    静默时段内或 is_busy() 返回 True（如正在手动下载）时跳过本次检查
+    """
+
+    def __init__(self, store, save_path, jobs_provider, network="LAN", interval=PREFETCH_INTERVAL,
+                 max_interval=PREFETCH_MAX_INTERVAL, workers=PREFETCH_WORKERS, quiet_hours=None,
+                 is_busy=None, status_callback=None, rate_limit=0):
+        """
+        :param store: ArtifactStore
+        :param save_path: 解压路径
+        :param jobs_provider: 返回任务列表的函数，任务格式与 batch_download 相同，每次检查时调用
+        :param network: 内网LAN 外网Internet
+        :param interval: 检查间隔（秒）
+        :param max_interval: 退避的最大间隔（秒）
+        :param workers: 同时下载的数量
+        :param quiet_hours: 静默时段 (开始小时, 结束小时)，可跨越午夜，如 (22, 6)；开始等于结束时不启用
+        :param is_busy: 返回 True 时跳过本次检查
+        :param status_callback: 状态回调 status_callback(消息)
+        :param rate_limit: 每个预取下载的限速（字节/秒），0 不限速
+        """
+        self.store = store
+        self.save_path = save_path
+        self.jobs_provider = jobs_provider
+        self.network = network
+        self.interval = interval
+        self.max_interval = max_interval
+        self.workers = workers
+        self.quiet_hours = quiet_hours
+        self.is_busy = is_busy
+        self.status_callback = status_callback
+        self.rate_limit = rate_limit
+        self.next_interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台线程，启动后立即检查一次"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=False):
+        """停止后台线程，正在下载的文件下载完成后退出"""
+        self._stopped.set()
+        self._wake.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def wake(self):
+        """立即检查一次"""
+        self._wake.set()
+
+    def in_quiet_hours(self, now=None):
+        """当前是否处于静默时段"""
+        if not self.quiet_hours or self.quiet_hours[0] == self.quiet_hours[1]:
+            return False
+        start, end = self.quiet_hours
+        hour = (now or datetime.datetime.now()).hour
+        if start < end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def _idle(self):
+        return not self._stopped.is_set() and not self.in_quiet_hours() and not (self.is_busy and self.is_busy())
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            if self._idle():
+                try:
+                    fetched = self.run_once()
+                except Exception as e:
+                    print(f"后台预取失败: {e}")
+                    fetched = []
+                self.next_interval = self.interval if fetched else min(self.next_interval * 2, self.max_interval)
+                delay = self.next_interval
+            else:
+                delay = self.interval
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def run_once(self):
+        """
+        检查一次，下载并解压仓库中没有的新版本
+        :return: 本次预取的文件名列表
+        """
+        jobs = self.jobs_provider()
+        fetched = []
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            futures = {executor.submit(self._prefetch, job): job.get("key", job["soft_type"]) for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    name = future.result()
+                except Exception as e:
+                    print(f"{futures[future]}: 后台预取失败: {e}")
+                    continue
+                if name:
+                    fetched.append(name)
+        return fetched
+
+    def _prefetch(self, job):
+        if not self._idle():
+            return None
+        edition = job.get("edition", "Debug")
+        name = resolve_latest(job["soft_type"], edition, self.network, job.get("model"), job.get("ver"))
+        target_path = os.path.join(self.save_path, name[:-4])
+        if self.store.lookup(name) is not None and os.path.isdir(target_path):
+            return None
+        # 检查版本期间可能开始了手动下载
+        if not self._idle():
+            return None
+
+        self._notify(f"{name}:正在后台预取")
+        with transfer_scheduler.job(name, "background", self.rate_limit):
+            digest, _ = fetch_artifact(self.store, name, job["soft_type"], edition, self.network)
+        self.store.extract(digest, target_path)
+        self._notify(f"{name}:后台预取完成")
+        return name
+
+    def _notify(self, message):
+        print(message)
+        if self.status_callback:
+            self.status_callback(message)
 
 
 def open_ics(path):
@@ -312,147 +2210,496 @@ def monitor_process_memory(process_name="ICSStudio.exe"):
         time.sleep(1)
 
 
-def ssh_to_device(ip="192.168.1.211", device_model="TURBO", command="reboot"):
-    """
-    针对turbo进行 远程ssh指令
-    :param device_model:
-    :param ip:
-    :param command:
-    :return:
-    """
-
-    # 设置SSH连接参数
-    hostname = ip
-    port = 22
-    # 从环境变量获取SSH凭据
-    password, username = get_username(device_model)
+# SSH 连接池：空闲超时（秒）、连接超时（秒）、保活间隔（秒）
+SSH_IDLE_TIMEOUT = 5 * 60
+SSH_CONNECT_TIMEOUT = 10
+SSH_KEEPALIVE = 30
+SSH_PORT = 22
+SHELL_TIMEOUT = 10
+# 提示符匹配输出末尾，普通用户以 $ 结尾，root 以 # 结尾
+SHELL_PROMPT = r"[$#]\s*$"
+ROOT_PROMPT = r"#\s*$"
+PASSWORD_PROMPT = r"[Pp]assword:\s*$"
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
 
-    # 创建SSH客户端
-    ssh_client = paramiko.SSHClient()
 
-    # 自动添加远程主机的SSH密钥（可选）
-    ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+class SSHSession:
+    """
+    一个设备的已认证SSH连接
+    打开的交互式shell（包括 su - 提权后的shell）会缓存复用，同一设备的操作通过 lock 串行执行
+    """
 
-    try:
-        # 连接远程服务器
-        ssh_client.connect(hostname, port, username, password)
+    def __init__(self, ip, model, client):
+        self.ip = ip
+        self.model = model
+        self.client = client
+        self.last_used = time.monotonic()
+        self.lock = threading.RLock()
+        self.privileged = False
+        self._shell = None
+
+    def is_alive(self):
+        """连接是否可用：传输层仍然活动且能发送数据"""
+        transport = self.client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except (paramiko.SSHException, OSError, EOFError):
+            return False
+        return True
 
-        if command == "reboot":
-            # 创建一个交互式shell
-            ssh_shell = ssh_client.invoke_shell()
+    def shell(self, privileged=False):
+        """
+        获取交互式shell，首次调用时打开
+        :param privileged: 是否需要root权限，需要时执行 su - 提权，已提权的shell直接复用
+        :return: InteractiveShell
+        :raise PermissionError: 提权失败
+        :raise TimeoutError: 等待提示符超时
+        """
+        if self._shell is None or self._shell.closed:
+            self._shell = InteractiveShell(self.client.invoke_shell())
+            self.privileged = False
+            # 等待登录后的提示符，以root登录（如 ICP）时已具有root权限
+            _, login_output = self._shell.expect(SHELL_PROMPT)
+            self.privileged = re.search(ROOT_PROMPT, login_output) is not None
+
+        if privileged and not self.privileged:
+            # 执行提权命令（su -），需要密码时输入提权密码
+            self._shell.send_line("su -")
+            index, su_output = self._shell.expect([PASSWORD_PROMPT, ROOT_PROMPT])
+            if index == 0:
+                self._shell.send_line("Icon!@#123")
+                # 检查是否切换到root用户
+                index, su_output = self._shell.expect([ROOT_PROMPT, SHELL_PROMPT])
+                self.privileged = index == 0
+            else:
+                # 已是root时 su - 直接进入新的root shell，不需要密码
+                self.privileged = True
+            if self.privileged:
+                print("提权成功")
+            else:
+                print(f"提权失败:{su_output.strip()}")
+                raise PermissionError(f"{self.ip}: 提权失败")
+        return self._shell
+
+    def exec(self, command, timeout=SSH_CONNECT_TIMEOUT):
+        """
+        在新的通道上执行命令，不经过交互式shell
+        :return: (退出码, 标准输出)
+        """
+        _, stdout, _ = self.client.exec_command(command, timeout=timeout)
+        output = stdout.read().decode('utf-8', errors='replace')
+        return stdout.channel.recv_exit_status(), output
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception as e:
+            print(f"{self.ip}: 关闭SSH连接时出错: {e}")
 
-            ssh_shell.send(b"clear\n")
-            # 等待命令执行完毕
-            while not ssh_shell.recv_ready():
-                time.sleep(1)
 
-            print(f"clear:{ssh_shell.recv(5048).decode('utf-8')}")
-            if device_model in ["TURBO", "ICP"]:
-                # 执行提权命令（su -）
-                ssh_shell.send(b"su -\n")
+class InteractiveShell:
+    """
+    expect 风格的交互式shell驱动
+    增量读取通道输出，用正则匹配提示符，输出一到达即返回，不再按秒轮询；超时抛出 TimeoutError
+    """
 
-                # 等待命令执行完毕
-                while not ssh_shell.recv_ready():
-                    time.sleep(1)
+    def __init__(self, channel, timeout=SHELL_TIMEOUT):
+        self.channel = channel
+        self.timeout = timeout
+        self.buffer = ""
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    @property
+    def closed(self):
+        return self.channel.closed
+
+    def send_line(self, line):
+        self.channel.sendall(line.encode('utf-8') + b"\n")
+
+    def expect(self, patterns, timeout=None):
+        """
+        读取输出直到匹配其中一个正则，多个正则都匹配时取位置最靠前的
+        :param patterns: 正则或正则列表
+        :param timeout: 超时秒数，默认 self.timeout
+        :return: (匹配到的正则序号, 截至匹配处的输出)，匹配处之后的输出留待下次读取
+        :raise TimeoutError: 超时未匹配
+        :raise EOFError: 通道已关闭且未匹配
+        """
+        if isinstance(patterns, (str, re.Pattern)):
+            patterns = [patterns]
+        patterns = [re.compile(pattern) for pattern in patterns]
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            matches = [(match.start(), index, match) for index, pattern in enumerate(patterns)
+                       if (match := pattern.search(self.buffer))]
+            if matches:
+                _, index, match = min(matches, key=lambda item: item[:2])
+                output, self.buffer = self.buffer[:match.end()], self.buffer[match.end():]
+                return index, output
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"等待提示符超时，已收到:{self.buffer[-200:]!r}")
+            self.channel.settimeout(remaining)
+            try:
+                data = self.channel.recv(4096)
+            except socket.timeout:
+                # Python 3.10 起 socket.timeout 是 TimeoutError 的别名，3.8/3.9 上两者不同
+                continue
+            if not data:
+                raise EOFError(f"连接已关闭，已收到:{self.buffer[-200:]!r}")
+            # 去掉终端控制序列（如 clear 输出的清屏序列），不完整的序列留到下次拼接后再去掉
+            self.buffer = ANSI_ESCAPE.sub("", self.buffer + self._decoder.decode(data))
+
+    def run(self, command, timeout=None):
+        """
+        执行命令并等待提示符重新出现
+        :return: 命令输出（不含回显和提示符）
+        """
+        self.buffer = ""
+        self.send_line(command)
+        _, output = self.expect(SHELL_PROMPT, timeout)
+        lines = output.replace("\r", "").split("\n")
+        # 第一行是命令回显，最后一行是提示符
+        return "\n".join(lines[1:-1])
+
+
+class SessionPool:
+    """
+    按设备保存已登录的会话，同一设备的重复操作不再重新连接和登录
+    取用时检查会话是否可用，不可用时重新连接；空闲超过 idle_timeout 的会话由后台线程关闭
+    子类实现 _connect(*key) 建立会话，会话需提供 lock、last_used、is_alive() 和 close()
+    """
+    # 出现这些错误后会话可能已不可用，下次取用时重新连接
+    connection_errors = (EOFError, ConnectionError, TimeoutError, socket.timeout)
+
+    def __init__(self, idle_timeout=SSH_IDLE_TIMEOUT, connect_timeout=SSH_CONNECT_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self._sessions = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def session(self, *key):
+        """
+        取用设备的会话，用 with 语句包围操作，期间持有该会话的锁，同一设备的操作依次执行
+        :param key: 设备标识，如 (ip, 型号)
+        :return: 上下文管理器，得到会话对象
+        """
+        return _PooledSession(self, key)
+
+    def _connect(self, *key):
+        raise NotImplementedError
+
+    def _acquire(self, key):
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+            self._start_reaper()
+        # 同一设备同时只建立一个连接
+        with key_lock:
+            with self._lock:
+                session = self._sessions.get(key)
+            if session is not None:
+                with session.lock:
+                    if session.is_alive():
+                        session.last_used = time.monotonic()
+                        return session
+                print(f"{key[0]}: 连接已断开，重新连接")
+                self.discard(*key)
+
+            session = self._connect(*key)
+            with self._lock:
+                self._sessions[key] = session
+            return session
+
+    def discard(self, *key):
+        """关闭并移除设备的会话，如设备重启后"""
+        with self._lock:
+            session = self._sessions.pop(key, None)
+        if session is not None:
+            session.close()
+
+    def close_idle(self):
+        """关闭空闲超时的会话"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, session in self._sessions.items()
+                    if now - session.last_used > self.idle_timeout and session.lock.acquire(blocking=False)]
+            sessions = [self._sessions.pop(key) for key in idle]
+        for session in sessions:
+            session.lock.release()
+            session.close()
+
+    def close_all(self):
+        """关闭所有会话"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def _start_reaper(self):
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+
+        def reap():
+            while True:
+                time.sleep(max(1, self.idle_timeout / 2))
+                self.close_idle()
+
+        self._reaper = threading.Thread(target=reap, name=f"{type(self).__name__}-reaper", daemon=True)
+        self._reaper.start()
+
+
+class SSHSessionPool(SessionPool):
+    """按 (ip, 型号) 保存已认证的SSH连接"""
+    connection_errors = (paramiko.SSHException,) + SessionPool.connection_errors
+
+    def _connect(self, ip, model):
+        password, username = get_username(model)
+        client = paramiko.SSHClient()
+        # 自动添加远程主机的SSH密钥
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(ip, SSH_PORT, username, password, timeout=self.connect_timeout,
+                           banner_timeout=self.connect_timeout, auth_timeout=self.connect_timeout)
+        except BaseException:
+            client.close()
+            raise
+        client.get_transport().set_keepalive(SSH_KEEPALIVE)
+        return SSHSession(ip, model, client)
 
-                print(f"su:{ssh_shell.recv(1024).decode('utf-8')}")
 
-                # 输入提权密码
-                ssh_shell.send(b"Icon!@#123\n")
+class _PooledSession:
+    def __init__(self, pool, key):
+        self.pool = pool
+        self.key = key
+        self.session = None
 
-                # 等待命令执行完毕
-                while not ssh_shell.recv_ready():
-                    time.sleep(1)
+    def __enter__(self):
+        self.session = self.pool._acquire(self.key)
+        self.session.lock.acquire()
+        return self.session
 
-                # 读取stdout输出，检查是否切换到root用户
-                su_output = ssh_shell.recv(1024).decode('utf-8')
-                if "root@" in su_output or "#" in su_output:
-                    print("提权成功")
-                    # 在此处执行需要root权限的操作
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.session.last_used = time.monotonic()
+        self.session.lock.release()
+        # 连接层面的错误后会话可能已不可用，下次重新连接
+        if isinstance(exc_value, self.pool.connection_errors):
+            self.pool.discard(*self.key)
 
-                    # 执行重启命令
 
-                    ssh_shell.send(b"reboot\n")
+ssh_pool = SSHSessionPool()
 
-                    while not ssh_shell.recv_ready():
-                        time.sleep(1)
 
-                    print(f"reboot:{ssh_shell.recv(1024).decode('utf-8')}")
-                    return True
-                else:
-                    print("提权失败")
+def ssh_to_device(ip="192.168.1.211", device_model="TURBO", command="reboot", raise_errors=False):
+    """
+    针对turbo进行 远程ssh指令
+    连接从 ssh_pool 取用，同一设备的后续操作不再重新握手和认证；TURBO/ICP 提权后的shell同样复用
+    :param device_model:
+    :param ip:
+    :param command: reboot 通过交互式shell重启，其他命令直接执行并返回输出
+    :param raise_errors: 出错时抛出异常而不是返回 False，供调用方区分认证失败、超时等
+    :return:
+    """
+    try:
+        with ssh_pool.session(ip, device_model) as session:
+            if command == "reboot":
+                try:
+                    # 创建（或复用）交互式shell，TURBO/ICP 需要提权
+                    ssh_shell = session.shell(privileged=device_model in ["TURBO", "ICP"])
+                except PermissionError:
+                    if raise_errors:
+                        raise
                     return False
-            elif device_model == "ICM" or device_model == "ANTER" or device_model == "BANTER":
-                ssh_shell.send(b"reboot\n")
-                while not ssh_shell.recv_ready():
-                    time.sleep(1)
 
-                print(f"reboot:{ssh_shell.recv(1024).decode('utf-8')}")
+                # 执行重启命令，收到回显即说明设备已接受，设备也可能直接断开连接
+                ssh_shell.send_line("reboot")
+                try:
+                    _, output = ssh_shell.expect(r"reboot\s*\n")
+                    print(f"reboot:{output.strip()}")
+                except EOFError:
+                    print("reboot:连接已断开")
+                # 设备重启后连接失效
+                ssh_pool.discard(ip, device_model)
                 return True
 
+            _, output = session.exec(command)
+            return output
+
     except paramiko.AuthenticationException:
         print("认证失败，请检查用户名和密码或SSH密钥。")
+        if raise_errors:
+            raise
         return False
     except paramiko.SSHException as e:
         print("SSH连接或执行命令时发生错误:", str(e))
+        if raise_errors:
+            raise
         return False
     except Exception as e:
         print("发生错误:", str(e))
+        if raise_errors:
+            raise
         return False
-    finally:
-        # 确保在异常情况下关闭SSH连接
-        ssh_client.close()
 
 
-def telnet_to_device(ip="192.168.1.211", command="reboot"):
+def parse_free_output(output):
     """
-    针对B/PRO进行 远程telnet指令
-    :param command: 执行的命令
-    :param ip:PLC的IP
-    :return:
+    解析 free -h 的输出，获取内存使用情况
+    :return: {"总内存", "已使用内存", "可用内存"}，未找到时为空字典
+    """
+    lines = output.splitlines()
+    men = {}
+    for line in lines:
+        if "Mem:" in line:
+            _, total, used, free, *_ = re.split(r'\s+', line.strip())
+            men["总内存"] = total
+            men["已使用内存"] = used
+            men["可用内存"] = free
+            break
+    return men
+
+
+TELNET_PORT = 23
+TELNET_TIMEOUT = 5
+TELNET_LOGIN_PROMPT = rb"login:\s*$"
+TELNET_PASSWORD_PROMPT = rb"[Pp]assword:\s*$"
+TELNET_PROMPT = rb"[$#]\s*$"
+TELNET_LOGIN_FAILED = rb"[Ll]ogin incorrect|login:\s*$"
+
+
+class TelnetSession:
+    """
+    一个设备的已登录telnet会话，登录一次后保持shell打开，命令通过提示符判断执行完成
     """
 
-    HOST = ip  # 设备的 IP 地址
-    PORT = 23  # Telnet 端口号
+    def __init__(self, ip, timeout=TELNET_TIMEOUT):
+        self.ip = ip
+        self.timeout = timeout
+        self.last_used = time.monotonic()
+        self.lock = threading.RLock()
+        self.commands = 0
+        self.tn = telnetlib.Telnet(ip, TELNET_PORT, timeout)
+        try:
+            self._login()
+        except BaseException:
+            self.tn.close()
+            raise
+
+    def _expect(self, patterns, timeout=None):
+        """
+        读取输出直到匹配其中一个正则
+        :return: (匹配到的正则序号, 截至匹配处的输出)
+        :raise TimeoutError: 超时未匹配
+        """
+        if isinstance(patterns, bytes):
+            patterns = [patterns]
+        index, _, output = self.tn.expect(patterns, self.timeout if timeout is None else timeout)
+        if index < 0:
+            raise TimeoutError(f"{self.ip}: 等待提示符超时，已收到:{output[-200:]!r}")
+        return index, output.decode('ascii', errors='replace')
+
+    def _login(self):
+        """登录设备"""
+        self._expect(TELNET_LOGIN_PROMPT)
+        self.tn.write(b"root\r\n")
+        self._expect(TELNET_PASSWORD_PROMPT)
+        self.tn.write(b"Icon!@#123\r\n")
+        index, _ = self._expect([TELNET_PROMPT, TELNET_LOGIN_FAILED])
+        if index == 1:
+            raise PermissionError(f"{self.ip}: 登录失败")
+
+    def is_alive(self):
+        """会话是否可用，同时丢弃之前残留的输出"""
+        try:
+            self.tn.read_very_eager()
+        except (EOFError, OSError):
+            return False
+        return self.tn.get_socket() is not None
+
+    def run(self, command, timeout=None):
+        """
+        执行命令并等待提示符重新出现
+        :return: 命令输出（不含回显和提示符）
+        """
+        self.tn.write(command.encode('ascii') + b"\n")
+        _, output = self._expect(TELNET_PROMPT, timeout)
+        self.commands += 1
+        lines = output.replace("\r", "").split("\n")
+        # 第一行是命令回显，最后一行是提示符
+        return "\n".join(lines[1:-1])
+
+    def send(self, command):
+        """发送命令，不等待提示符（如 reboot），收到回显或连接断开即返回"""
+        self.tn.write(command.encode('ascii') + b"\r\n")
+        try:
+            self.tn.expect([re.escape(command.encode('ascii'))], 1)
+        except EOFError:
+            pass
 
-    try:
-        # 连接到设备
-        tn = telnetlib.Telnet(HOST, PORT, 3)
+    def close(self):
+        try:
+            self.tn.close()
+        except Exception as e:
+            print(f"{self.ip}: 关闭telnet连接时出错: {e}")
 
-        # 登录设备
-        icon_login = tn.read_until(b"Icon login: ", 5)
-        if not icon_login:
-            raise OSError
-        tn.write(b"root\r\n")
-        tn.read_until(b"Password: ", 5)
-        tn.write(b"Icon!@#123\r\n")
 
-        # 执行命令
-        tn.read_until(b"# ", 5)
+class TelnetSessionPool(SessionPool):
+    """按 ip 保存已登录的telnet会话"""
+    connection_errors = (OSError, EOFError)
 
-        if command == "free":
-            tn.write(b"free -h\n")
-            output = tn.read_until(b"# ", 5).decode('ascii')
+    def __init__(self, idle_timeout=SSH_IDLE_TIMEOUT, connect_timeout=TELNET_TIMEOUT):
+        super().__init__(idle_timeout, connect_timeout)
 
-            # 解析命令输出，获取内存使用情况
-            lines = output.splitlines()
-            men = {}
-            for line in lines:
-                if "Mem:" in line:
-                    _, total, used, free, *_ = re.split(r'\s+', line)
-                    men["总内存"] = total
-                    men["已使用内存"] = used
-                    men["可用内存"] = free
-                    break
-            # 关闭 Telnet 连接
-            tn.close()
+    def _connect(self, ip):
+        return TelnetSession(ip, self.connect_timeout)
+
+    def run(self, ip, command, timeout=None, wait=True):
+        """
+        在设备的会话上执行命令，复用的会话中途断开时重新登录再执行一次
+        :param wait: 是否等待提示符，False 时只发送命令（如 reboot）
+        :return: 命令输出，wait 为 False 时返回 None
+        """
+        for attempt in range(2):
+            with self.session(ip) as session:
+                reused = session.commands > 0
+                try:
+                    if not wait:
+                        return session.send(command)
+                    return session.run(command, timeout)
+                except (EOFError, ConnectionError):
+                    if attempt or not reused:
+                        raise
+                    print(f"{ip}: telnet会话已断开，重新登录")
+                    self.discard(ip)
+
+
+telnet_pool = TelnetSessionPool()
+
+
+def telnet_to_device(ip="192.168.1.211", command="reboot", raise_errors=False):
+    """
+    针对B/PRO进行 远程telnet指令
+    会话从 telnet_pool 取用，登录一次后保持打开，同一设备的命令依次执行；会话断开时自动重新登录
+    :param command: 执行的命令
+    :param ip:PLC的IP
+    :param raise_errors: 出错时抛出异常而不是返回 False，供调用方区分认证失败、超时等
+    :return:
+    """
+    try:
+        if command == "free":
+            output = telnet_pool.run(ip, "free -h")
+            men = parse_free_output(output)
             print(f"{command}命令执行成功！")
             return men
         elif command == "ls":
             # 执行命令获取文件大小信息
             cfg_path = "/mnt/data0/config/project.cfg"
-            tn.write(f"ls -l {cfg_path} \n".encode('ascii'))
-            output = tn.read_until(b"# ", 5).decode('ascii')
+            output = telnet_pool.run(ip, f"ls -l {cfg_path} ")
 
             # 解析命令输出，获取文件大小
             lines = output.splitlines()
@@ -462,49 +2709,514 @@ def telnet_to_device(ip="192.168.1.211", command="reboot"):
                     _, _, _, _, size, *_ = line.split()
                     men["size"] = size
                     break
-            tn.close()
             print(f"{command}命令执行成功！")
             return men
         elif command == "reboot":
-            tn.write(command.encode('ascii') + b"\r\n")
-            time.sleep(1)
-            # 关闭 Telnet 连接
-            tn.close()
+            telnet_pool.run(ip, command, wait=False)
+            # 设备重启后会话失效
+            telnet_pool.discard(ip)
             print(f"{command}命令执行成功！")
             return True
     except TimeoutError:
         print("连接超时")
+        if raise_errors:
+            raise
         return False
-    except OSError:
+    except PermissionError:
+        print("登录失败，请检查用户名和密码。")
+        if raise_errors:
+            raise
+        return False
+    except (OSError, EOFError):
         print("网络错误")
+        if raise_errors:
+            raise
         return False
     except Exception as e:
         print("发生错误:", str(e))
         raise e
 
 
-def reboot_device(device_model, ip):
+# 通过telnet重启的型号
+TELNET_MODELS = ['LITE', "LITE.B", 'PRO', 'PRO.B', 'EVO', 'ICM-D3', 'ICM-D5', 'ICF-C', 'ICM-D7', "KCU"]
+# 通过SSH重启的型号，映射为SSH登录使用的型号
+SSH_MODELS = {"ICM-D1": "ICM", "ICD-ANTER": "ANTER", "ICC-BANTER": "BANTER", "TURBO": "TURBO", "ICP": "ICP"}
+DEVICE_MODELS = TELNET_MODELS + list(SSH_MODELS)
+
+
+def reboot_device(device_model, ip, raise_errors=False):
     """
     重启设备
     :param device_model: 设备型号：eg ICC-B010ERM
     :param ip:
+    :param raise_errors: 出错时抛出异常而不是返回 False
     :return:
     """
     print(f"重启设备:设备型号：{device_model},设备IP：{ip}")
-    if device_model in ['LITE', "LITE.B", 'PRO', 'PRO.B', 'EVO', 'ICM-D3', 'ICM-D5', 'ICF-C', 'ICM-D7',"KCU"]:
-        return telnet_to_device(ip)
-    elif device_model in ['ICM-D1']:
-        return ssh_to_device(ip, device_model="ICM")
-    elif device_model == 'ICD-ANTER':
-        return ssh_to_device(ip, device_model="ANTER")
-    elif device_model == 'ICC-BANTER':
-        return ssh_to_device(ip, device_model="BANTER")
-    elif device_model in ["TURBO", "ICP"]:
-        return ssh_to_device(ip, device_model=device_model)
+    if device_model in TELNET_MODELS:
+        return telnet_to_device(ip, raise_errors=raise_errors)
+    elif device_model in SSH_MODELS:
+        return ssh_to_device(ip, device_model=SSH_MODELS[device_model], raise_errors=raise_errors)
     else:
         return
 
 
+READY_PORTS = (21, 22, 23)
+READY_PROBE_TIMEOUT = 1
+READY_PROBE_INTERVAL = 0.5
+READY_DOWN_TIMEOUT = 60
+READY_UP_TIMEOUT = 300
+
+
+@dataclass
+class RebootTiming:
+    """重启耗时，均从重启命令被设备接受时起计算，未检测到时为 None"""
+    ip: str
+    model: str
+    down: Optional[float] = None
+    up: Optional[float] = None
+    ready: Optional[float] = None
+    message: str = ""
+
+    @property
+    def ok(self):
+        return self.ready is not None
+
+    def __bool__(self):
+        return self.ok
+
+    def __str__(self):
+        parts = []
+        if self.down is not None:
+            parts.append(f"断开 {self.down:.1f}s")
+        if self.up is not None:
+            parts.append(f"端口恢复 {self.up:.1f}s")
+        if self.ready is not None and self.ready != self.up:
+            parts.append(f"登录可用 {self.ready:.1f}s")
+        if self.message:
+            parts.append(self.message)
+        return "，".join(parts)
+
+
+def _device_port(device_model):
+    """设备的登录端口"""
+    return 23 if device_model in TELNET_MODELS else 22
+
+
+async def _probe_port(ip, port, timeout):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def _probe_ports(ip, ports, timeout=READY_PROBE_TIMEOUT):
+    results = await asyncio.gather(*(_probe_port(ip, port, timeout) for port in ports))
+    return {port for port, is_open in zip(ports, results) if is_open}
+
+
+def probe_ports(ip, ports=READY_PORTS, timeout=READY_PROBE_TIMEOUT):
+    """
+    并发探测设备的TCP端口，只建立连接不收发数据
+    :return: 可连接的端口集合
+    """
+    return asyncio.run(_probe_ports(ip, ports, timeout))
+
+
+def check_login(device_model, ip):
+    """登录设备确认服务可用，登录后的会话留在连接池中供后续操作复用"""
+    if device_model in TELNET_MODELS:
+        with telnet_pool.session(ip):
+            pass
+    else:
+        with ssh_pool.session(ip, SSH_MODELS[device_model]):
+            pass
+    return True
+
+
+async def _wait_for_ready(device_model, ip, ports, begin, login_check, down_timeout, up_timeout, interval):
+    timing = RebootTiming(ip, device_model)
+
+    # 等待所有端口关闭，即设备已断开
+    while True:
+        probe_at = time.monotonic()
+        if not await _probe_ports(ip, ports):
+            timing.down = probe_at - begin
+            break
+        if probe_at - begin > down_timeout:
+            timing.message = f"{down_timeout}s 内未检测到设备断开"
+            return timing
+        await asyncio.sleep(interval)
+
+    # 等待所有端口恢复
+    while True:
+        probe_at = time.monotonic()
+        if await _probe_ports(ip, ports) == set(ports):
+            timing.up = probe_at - begin
+            break
+        if probe_at - begin > up_timeout:
+            timing.message = f"{up_timeout}s 内设备未恢复"
+            return timing
+        await asyncio.sleep(interval)
+
+    if not login_check:
+        timing.ready = timing.up
+        return timing
+
+    # 端口恢复后服务可能还未就绪，登录成功才算可用；认证失败不再重试
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, check_login, device_model, ip)
+            timing.ready = time.monotonic() - begin
+            return timing
+        except (paramiko.AuthenticationException, PermissionError) as e:
+            timing.message = f"登录失败: {e}"
+            return timing
+        except Exception as e:
+            if time.monotonic() - begin > up_timeout:
+                timing.message = f"登录检查失败: {e}"
+                return timing
+        await asyncio.sleep(interval)
+
+
+def wait_for_ready(device_model, ip, begin=None, ports=None, login_check=False, down_timeout=READY_DOWN_TIMEOUT,
+                   up_timeout=READY_UP_TIMEOUT, interval=READY_PROBE_INTERVAL):
+    """
+    等待重启中的设备断开并恢复，用异步TCP连接探测端口
+    :param begin: 计时起点（time.monotonic()），默认为调用时
+    :param ports: 探测的端口，默认为设备的登录端口
+    :param login_check: 端口恢复后是否登录确认
+    :param down_timeout: 等待断开的超时秒数
+    :param up_timeout: 等待恢复（及登录）的超时秒数，从 begin 起算
+    :param interval: 探测间隔
+    :return: RebootTiming，未就绪时 ok 为 False 并在 message 中说明
+    """
+    begin = time.monotonic() if begin is None else begin
+    ports = sorted(ports or [_device_port(device_model)])
+    return asyncio.run(_wait_for_ready(device_model, ip, ports, begin, login_check, down_timeout, up_timeout,
+                                       interval))
+
+
+def reboot_and_wait(device_model, ip, raise_errors=False, login_check=False, down_timeout=READY_DOWN_TIMEOUT,
+                    up_timeout=READY_UP_TIMEOUT):
+    """
+    重启设备并等待就绪，记录断开和恢复耗时
+    重启前先探测 21/22/23 端口，恢复时要求重启前开放的端口全部恢复
+    :return: RebootTiming；重启命令失败时返回 False
+    """
+    ports = probe_ports(ip) or {_device_port(device_model)}
+    if not reboot_device(device_model, ip, raise_errors=raise_errors):
+        return False
+    begin = time.monotonic()
+    timing = wait_for_ready(device_model, ip, begin, ports, login_check, down_timeout, up_timeout)
+    print(f"{ip}: 重启{'完成' if timing else '未完成'}，{timing}")
+    return timing
+
+
+FLEET_WORKERS = 16
+FLEET_MAX_TARGETS = 1024
+FLEET_OK = "ok"
+FLEET_AUTH_FAILED = "auth"
+FLEET_TIMEOUT = "timeout"
+FLEET_ERROR = "error"
+
+
+@dataclass
+class FleetResult:
+    """批量操作中一台设备的结果"""
+    ip: str
+    model: str
+    status: str
+    elapsed: float
+    message: str = ""
+    timing: Optional[RebootTiming] = None
+
+
+def _parse_ip_spec(spec):
+    """
+    解析单个IP、CIDR（192.168.1.0/28）或范围（192.168.1.10-20、192.168.1.10-192.168.1.20）
+    :return: IP字符串列表
+    :raise ValueError: 格式错误或数量超过 FLEET_MAX_TARGETS
+    """
+    if "/" in spec:
+        network = ipaddress.ip_network(spec, strict=False)
+        if network.num_addresses > FLEET_MAX_TARGETS + 2:
+            raise ValueError(f"{spec}: 地址数量超过 {FLEET_MAX_TARGETS}")
+        return [str(ip) for ip in network.hosts()] or [str(network.network_address)]
+    if "-" in spec:
+        start, end = spec.split("-", 1)
+        start = ipaddress.ip_address(start)
+        if "." not in end:
+            # 只写最后一段
+            end = start.exploded.rsplit(".", 1)[0] + "." + end
+        end = ipaddress.ip_address(end)
+        if end < start:
+            raise ValueError(f"{spec}: 范围结束地址小于起始地址")
+        if int(end) - int(start) >= FLEET_MAX_TARGETS:
+            raise ValueError(f"{spec}: 地址数量超过 {FLEET_MAX_TARGETS}")
+        return [str(ipaddress.ip_address(value)) for value in range(int(start), int(end) + 1)]
+    return [str(ipaddress.ip_address(spec))]
+
+
+def parse_fleet_targets(text, default_model=None, device_models=DEVICE_MODELS):
+    """
+    解析批量操作的设备列表，每行若干IP（单个IP、CIDR或范围，逗号或空格分隔）和可选的型号，
+    未写型号的行使用 default_model；# 之后为注释。重复的IP只保留第一次出现
+    例：
+        192.168.1.10-20 PRO
+        192.168.2.0/28, 192.168.3.5 TURBO
+    :param device_models: 支持的型号
+    :return: [(ip, 型号)]
+    :raise ValueError: 格式错误、型号不支持或缺少型号
+    """
+    models = {model.upper(): model for model in device_models}
+    targets = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        tokens = re.split(r"[\s,;]+", line.split("#", 1)[0].strip())
+        specs = [token for token in tokens if token and token.upper() not in models]
+        line_models = [models[token.upper()] for token in tokens if token.upper() in models]
+        if not specs:
+            continue
+        if len(line_models) > 1:
+            raise ValueError(f"第{number}行: 只能指定一个型号")
+        model = line_models[0] if line_models else default_model
+        if model not in device_models:
+            raise ValueError(f"第{number}行: 未指定型号或型号不支持: {model}")
+        for spec in specs:
+            try:
+                ips = _parse_ip_spec(spec)
+            except ValueError as e:
+                raise ValueError(f"第{number}行: {e}") from e
+            for ip in ips:
+                targets.setdefault(ip, model)
+        if len(targets) > FLEET_MAX_TARGETS:
+            raise ValueError(f"设备数量超过 {FLEET_MAX_TARGETS}")
+    return list(targets.items())
+
+
+def classify_device_error(error):
+    """将设备操作的异常归类为认证失败、超时或其他错误"""
+    if isinstance(error, (paramiko.AuthenticationException, PermissionError)):
+        return FLEET_AUTH_FAILED
+    if isinstance(error, TimeoutError):
+        return FLEET_TIMEOUT
+    return FLEET_ERROR
+
+
+def run_fleet(targets, action=reboot_device, workers=FLEET_WORKERS, result_callback=None):
+    """
+    通过有上限的线程池对多台设备并发执行操作，每台设备完成后立即回调
+    :param targets: [(ip, 型号)]，可由 parse_fleet_targets 得到
+    :param action: action(型号, ip, raise_errors=True)，返回假值视为失败；
+                   返回 RebootTiming（如 reboot_and_wait）时记录在结果中，未就绪视为超时
+    :param workers: 并发数
+    :param result_callback: 每台设备完成后回调 result_callback(FleetResult)
+    :return: [FleetResult]，按完成顺序
+    """
+    def run_one(ip, model):
+        begin = time.perf_counter()
+        timing = None
+        try:
+            outcome = action(model, ip, raise_errors=True)
+            if isinstance(outcome, RebootTiming):
+                timing = outcome
+                status, message = (FLEET_OK if timing else FLEET_TIMEOUT), str(timing)
+            elif outcome:
+                status, message = FLEET_OK, ""
+            else:
+                status, message = FLEET_ERROR, "执行失败"
+        except Exception as e:
+            status, message = classify_device_error(e), str(e) or type(e).__name__
+        return FleetResult(ip, model, status, time.perf_counter() - begin, message, timing)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(run_one, ip, model) for ip, model in targets]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result_callback:
+                result_callback(result)
+    return results
+
+
+SOAK_CYCLES = 100
+SOAK_INTERVAL = 5
+SOAK_RESULT_DIR = "soak"
+SOAK_COLUMNS = ["ip", "model", "cycle", "time", "status", "down", "up", "ready", "used_memory", "message"]
+
+
+def get_device_memory(device_model, ip):
+    """
+    获取设备内存使用情况，telnet型号通过 telnet_to_device，SSH型号执行 free -h
+    :return: {"总内存", "已使用内存", "可用内存"}，失败时为空字典
+    """
+    if device_model in TELNET_MODELS:
+        return telnet_to_device(ip, "free") or {}
+    output = ssh_to_device(ip, SSH_MODELS[device_model], "free -h")
+    return parse_free_output(output) if output else {}
+
+
+def percentile(values, percent):
+    """线性插值计算百分位数，values 为空时返回 None"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def find_outliers(values):
+    """
+    按四分位距找出异常值（小于 Q1-1.5IQR 或大于 Q3+1.5IQR）
+    :return: 异常值在 values 中的下标
+    """
+    if len(values) < 4:
+        return []
+    q1, q3 = percentile(values, 25), percentile(values, 75)
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    return [index for index, value in enumerate(values) if value < low or value > high]
+
+
+class SoakTest:
+    """
+    重启稳定性测试：对一台或多台设备同时重复重启 N 次
+    每次记录重启结果、断开/恢复/就绪耗时和重启后的内存使用，每次完成后写入结果文件
+    结果文件为 JSON：cycles 按 SOAK_COLUMNS 顺序每次一行，summary 为每台设备的就绪耗时百分位和异常值
+    """
+
+    def __init__(self, targets, save_path, cycles=SOAK_CYCLES, interval=SOAK_INTERVAL, login_check=True,
+                 workers=FLEET_WORKERS, cycle_callback=None):
+        """
+        :param targets: [(ip, 型号)]，可由 parse_fleet_targets 得到
+        :param save_path: 结果文件保存在 save_path/soak 下
+        :param cycles: 每台设备的重启次数
+        :param interval: 设备就绪后到下次重启的间隔秒数
+        :param login_check: 是否登录确认设备就绪
+        :param workers: 同时测试的设备数
+        :param cycle_callback: 每次重启完成后回调 cycle_callback(cycle, summary)，cycle 为 SOAK_COLUMNS 对应的字典
+        """
+        self.targets = targets
+        self.cycles = cycles
+        self.interval = interval
+        self.login_check = login_check
+        self.workers = workers
+        self.cycle_callback = cycle_callback
+        self.started = datetime.datetime.now()
+        self.result_file = os.path.join(save_path, SOAK_RESULT_DIR,
+                                        f"soak_{self.started.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+        self.records = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """停止测试，正在进行的重启完成后结束"""
+        self._stop_event.set()
+
+    def run(self):
+        """
+        运行测试，阻塞直到全部完成或停止
+        :return: 每台设备的统计，同 summary()
+        """
+        os.makedirs(os.path.dirname(self.result_file), exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(self.targets)))) as executor:
+            for future in [executor.submit(self._run_device, ip, model) for ip, model in self.targets]:
+                future.result()
+        self.save()
+        print(f"稳定性测试结束，结果文件: {self.result_file}")
+        return self.summary()
+
+    def _run_device(self, ip, model):
+        for number in range(1, self.cycles + 1):
+            if self._stop_event.is_set():
+                return
+            record = self._cycle(ip, model, number)
+            with self._lock:
+                self.records.append(record)
+                summary = self.summary()
+                self.save(summary)
+            if self.cycle_callback:
+                self.cycle_callback(record, summary[ip])
+            # 设备就绪后稍作停留再重启，停止时立即结束
+            if self._stop_event.wait(self.interval):
+                return
+
+    def _cycle(self, ip, model, number):
+        record = dict.fromkeys(SOAK_COLUMNS)
+        record.update(ip=ip, model=model, cycle=number, time=datetime.datetime.now().strftime("%H:%M:%S"))
+        try:
+            timing = reboot_and_wait(model, ip, raise_errors=True, login_check=self.login_check)
+            if timing is False:
+                record.update(status=FLEET_ERROR, message="执行失败")
+            else:
+                record.update(status=FLEET_OK if timing else FLEET_TIMEOUT, down=timing.down, up=timing.up,
+                              ready=timing.ready, message=timing.message)
+        except Exception as e:
+            record.update(status=classify_device_error(e), message=str(e) or type(e).__name__)
+        if record["status"] == FLEET_OK:
+            record["used_memory"] = get_device_memory(model, ip).get("已使用内存")
+        return record
+
+    def summary(self):
+        """
+        每台设备的统计：次数、失败数、就绪耗时 p50/p90/p99/最大值，以及就绪耗时异常的重启序号
+        """
+        summary = {}
+        for ip, model in self.targets:
+            records = [record for record in self.records if record["ip"] == ip]
+            ok = [record for record in records if record["status"] == FLEET_OK]
+            ready = [record["ready"] for record in ok]
+            summary[ip] = {
+                "model": model,
+                "cycles": len(records),
+                "failures": len(records) - len(ok),
+                "p50": percentile(ready, 50),
+                "p90": percentile(ready, 90),
+                "p99": percentile(ready, 99),
+                "max": max(ready, default=None),
+                "outliers": [ok[index]["cycle"] for index in find_outliers(ready)],
+                "failed_cycles": [record["cycle"] for record in records if record["status"] != FLEET_OK],
+                "used_memory": [ok[0]["used_memory"], ok[-1]["used_memory"]] if ok else [],
+            }
+        return summary
+
+    def save(self, summary=None):
+        """写入结果文件，每次重启一行，先写临时文件再替换，中途停止也保留已完成的记录"""
+        def rounded(value):
+            return round(value, 2) if isinstance(value, float) else value
+
+        header = {
+            "started": self.started.strftime("%Y-%m-%d %H:%M:%S"),
+            "updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "cycles_per_device": self.cycles,
+            "login_check": self.login_check,
+            "columns": SOAK_COLUMNS,
+        }
+        summary = summary or self.summary()
+        # 每台设备的统计和每次重启各占一行
+        lines = [f' "{key}": {json.dumps(value, ensure_ascii=False)}' for key, value in header.items()]
+        lines.append(' "summary": {\n' + ",\n".join(
+            f'  "{ip}": ' + json.dumps({key: rounded(value) for key, value in stats.items()}, ensure_ascii=False)
+            for ip, stats in summary.items()) + "\n }")
+        lines.append(' "cycles": [\n' + ",\n".join(
+            "  " + json.dumps([rounded(record[column]) for column in SOAK_COLUMNS], ensure_ascii=False)
+            for record in self.records) + "\n ]")
+        text = "{\n" + ",\n".join(lines) + "\n}\n"
+        temp_file = self.result_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temp_file, self.result_file)
+
+
 def is_directory(connection, item):
     try:
         if isinstance(connection, FTP):
@@ -534,95 +3246,254 @@ def get_files_By_FTP(icc_model, remote_path, local_path, ip="192.168.1.211"):
                 get_files_By_FTP(ftp, remote_file_path, local_file_path, ip)
             # 如果是文件，则下载
             else:
-                with open(local_file_path, 'wb') as local_file:
-                    ftp.retrbinary('RETR ' + remote_file_path, local_file.write)
+                with open(local_file_path, 'wb') as local_file, transfer_scheduler.job(remote_file_path) as job:
+                    def write_block(data):
+                        local_file.write(data)
+                        job.consume(len(data))
+
+                    ftp.retrbinary('RETR ' + remote_file_path, write_block)
         ftp.quit()
     except Exception as e:
         ftp.quit()
         raise e
 
 
+SFTP_CHUNK_SIZE = 32768
+# 不小于该大小的文件使用预取读取
+SFTP_PREFETCH_SIZE = 256 * 1024
+
+
 def get_files_By_SFTP(icc_model, remote_path, local_path, ip="192.168.1.211"):
     """
-
+    通过SFTP下载远程目录，整个目录树在同一个SFTP会话中遍历
     :param icc_model:
     :param remote_path:
     :param local_path:
     :param ip:
     :return:
     """
-    os.makedirs(local_path, exist_ok=True)
-
-    password, username = get_username(icc_model)
-    ssh = paramiko.SSHClient()
+    sftp = None
     try:
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(ip, 22, username, password)
-
-        sftp = ssh.open_sftp()
-
-        sftp.chdir(remote_path)
-        filenames = sftp.listdir()
+        # 从连接池取用连接，同一设备的多个目录复用同一连接
+        with ssh_pool.session(ip, icc_model) as session:
+            sftp = session.client.open_sftp()
+            _get_files_by_sftp(sftp, remote_path, local_path)
+    finally:
+        if sftp is not None:
+            sftp.close()
 
-        for filename in filenames:
-            local_file_path = f"{local_path}/{filename}"
-            remote_file_path = f"{remote_path}/{filename}"
 
-            # 如果是目录，则递归下载
-            if is_directory(sftp, remote_file_path):
-                # 判断有无权限
+def _get_files_by_sftp(sftp, remote_path, local_path):
+    """
+    遍历远程目录树并下载文件
+    用 listdir_attr 一次取得目录中所有条目的属性区分目录和文件，不再逐个 chdir 试探；
+    指向文件的链接下载其内容，指向目录的链接和设备、管道等特殊文件跳过
+    """
+    try:
+        with transfer_scheduler.job(remote_path) as job:
+            pending = [(remote_path, local_path)]
+            while pending:
+                remote_dir, local_dir = pending.pop()
+                os.makedirs(local_dir, exist_ok=True)
                 try:
-                    get_files_By_SFTP(icc_model, remote_file_path, local_file_path, ip)
+                    entries = sftp.listdir_attr(remote_dir)
+                except FileNotFoundError:
+                    print(f"目录不存在: {remote_dir}")
+                    continue
                 except PermissionError:
-                    print(f"{remote_file_path}：没有权限")
+                    print(f"没有权限访问目录: {remote_dir}")
                     continue
-                except Exception as e:
-                    raise e
-            # 如果是文件，则下载
-            else:
-                sftp.get(remote_file_path, local_file_path)
-    except FileNotFoundError:
-        print(f"目录不存在: {remote_path}")
-    except PermissionError:
-        print(f"没有权限访问目录: {remote_path}")
+
+                for entry in entries:
+                    remote_file_path = f"{remote_dir.rstrip('/')}/{entry.filename}"
+                    local_file_path = f"{local_dir}/{entry.filename}"
+                    mode, size = entry.st_mode or 0, entry.st_size or 0
+                    if S_ISLNK(mode):
+                        try:
+                            target = sftp.stat(remote_file_path)
+                        except (FileNotFoundError, PermissionError):
+                            print(f"{remote_file_path}：链接无效")
+                            continue
+                        if S_ISDIR(target.st_mode):
+                            print(f"{remote_file_path}：跳过指向目录的链接")
+                            continue
+                        mode, size = target.st_mode, target.st_size or 0
+
+                    if S_ISDIR(mode):
+                        pending.append((remote_file_path, local_file_path))
+                    elif S_ISREG(mode):
+                        try:
+                            _sftp_download(sftp, remote_file_path, local_file_path, size, job)
+                        except (FileNotFoundError, PermissionError) as e:
+                            # 列出目录后被删除（/tmp 中常见）或没有权限，跳过该文件继续遍历
+                            reason = "文件已不存在" if isinstance(e, FileNotFoundError) else "没有权限"
+                            print(f"{remote_file_path}：{reason}")
+                            if os.path.exists(local_file_path):
+                                os.remove(local_file_path)
+                    else:
+                        print(f"{remote_file_path}：跳过特殊文件")
     except Exception as e:
         print(f"发生错误: {str(e)}")
         raise e
-    finally:
-        ssh.close()
 
 
-def get_device_logs(device_model, local_path, ip="192.168.1.211"):
+def _sftp_download(sftp, remote_file_path, local_file_path, size, job):
     """
-    获取日志
+    下载单个文件，每块数据计入传输任务
+    大文件先发出预取请求，多个读请求同时在途，不必逐块等待往返
+    """
+    with sftp.open(remote_file_path, "rb") as remote_file, open(local_file_path, "wb") as local_file:
+        if size >= SFTP_PREFETCH_SIZE:
+            remote_file.prefetch(size)
+        while True:
+            data = remote_file.read(SFTP_CHUNK_SIZE)
+            if not data:
+                break
+            local_file.write(data)
+            job.consume(len(data))
+
+
+# 支持获取日志的型号：(传输方式, [(远程目录, 本地子目录)])
+_CONFIG_AND_TMP = [("/mnt/data0/config", "config"), ("/tmp", "tmp")]
+_MMC = [("/mnt/mmc/", "mmc")]
+LOG_MODELS = {
+    "LITE": ("FTP", _CONFIG_AND_TMP),
+    "LITE.B": ("FTP", _CONFIG_AND_TMP),
+    "PRO": ("FTP", _CONFIG_AND_TMP),
+    "PRO.B": ("FTP", _CONFIG_AND_TMP),
+    "EVO": ("FTP", _CONFIG_AND_TMP),
+    "TURBO": ("SFTP", _CONFIG_AND_TMP),
+    "ICM-D1": ("SFTP", _MMC),
+    "ICM-D3": ("FTP", _MMC),
+    "ICM-D5": ("FTP", _MMC),
+    "ICM-D7": ("FTP", _MMC),
+    "ICF-C": ("FTP", _MMC),
+    "KCU": ("FTP", _MMC),
+}
+
+
+def get_device_logs(device_model, local_path, ip="192.168.1.211", raise_errors=False):
+    """
+    获取日志，保存在 local_path/logs/日期_IP 目录下并压缩为同名zip
     :param local_path:
-    :param device_model:
+    :param device_model: LOG_MODELS 中的型号
     :param ip:
-    :return:
+    :param raise_errors: 出错时抛出异常而不是返回 False
+    :return: 成功时返回zip文件路径
+    :raise ValueError: 型号不支持获取日志（raise_errors 为 True 时）
     """
     try:
-        # 生成文件夹名称为日期
-        local_directory = f"{local_path}/logs/{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
-
-        if device_model in ["PRO", "LITE", "LITE.B", "PRO.B", "EVO"]:
-            get_files_By_FTP(device_model, "/mnt/data0/config", local_directory + "/config", ip)
-            get_files_By_FTP(device_model, "/tmp", local_directory + "/tmp", ip)
-        elif device_model in ["TURBO"]:
-            get_files_By_SFTP(device_model, "/mnt/data0/config", local_directory + "/config", ip)
-            get_files_By_SFTP(device_model, "/tmp", local_directory + "/tmp", ip)
-        elif device_model in ["ICM-D1"]:
-            get_files_By_SFTP(device_model, "/mnt/mmc/", local_directory + "/mmc", ip)
-        elif device_model in ["ICM-D3", "ICM-D5", "ICF", "ICM-D7", "KCU"]:
-            get_files_By_FTP(device_model, "/mnt/mmc/", local_directory + "/mmc", ip)
+        if device_model not in LOG_MODELS:
+            raise ValueError(f"型号 {device_model} 不支持获取日志")
+        protocol, paths = LOG_MODELS[device_model]
+        get_files = get_files_By_SFTP if protocol == "SFTP" else get_files_By_FTP
+
+        # 生成文件夹名称为日期和IP
+        local_directory = f"{local_path}/logs/{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{ip}"
+
+        # 日志传输优先级高于后台预取
+        with transfer_scheduler.job(f"{device_model} {ip} logs", "log"):
+            for remote_path, local_name in paths:
+                get_files(device_model, remote_path, f"{local_directory}/{local_name}", ip)
 
         # 压缩整个目录下的所有文件
         zip_files(local_directory, local_directory + ".zip")
-        return True
+        return local_directory + ".zip"
     except Exception as e:
         print(e)
+        if raise_errors:
+            raise
         return False
 
 
+LOG_COLLECT_WORKERS = 8
+LOG_PROGRESS_INTERVAL = 0.5
+
+
+@dataclass
+class LogResult:
+    """批量获取日志中一台设备的结果"""
+    ip: str
+    model: str
+    status: str
+    elapsed: float
+    transferred: int = 0
+    archive: Optional[str] = None
+    files: int = 0
+    message: str = ""
+
+
+def collect_device_logs(targets, local_path, workers=LOG_COLLECT_WORKERS, progress_callback=None,
+                        result_callback=None):
+    """
+    并发获取多台设备的日志，每台设备单独打包（local_path/logs/日期_IP.zip），全部完成后写入汇总清单
+    :param targets: [(ip, 型号)]，可由 parse_fleet_targets 得到
+    :param local_path: 保存路径
+    :param workers: 同时获取的设备数
+    :param progress_callback: 传输中定时回调 progress_callback(ip, 已传输字节数)
+    :param result_callback: 每台设备完成后回调 result_callback(LogResult)
+    :return: (清单文件路径, [LogResult])
+    """
+    started = datetime.datetime.now()
+    jobs = {}
+
+    def run_one(ip, model):
+        begin = time.perf_counter()
+        # 先创建传输任务，get_device_logs 中的各个文件复用该任务，已传输字节数即为该设备的进度
+        with transfer_scheduler.job(f"{model} {ip} logs", "log") as job:
+            jobs[ip] = job
+            try:
+                archive = get_device_logs(model, local_path, ip, raise_errors=True)
+                with zipfile.ZipFile(archive) as zip_file:
+                    files = sum(not info.is_dir() for info in zip_file.infolist())
+                result = LogResult(ip, model, FLEET_OK, 0, job.transferred, archive, files)
+            except Exception as e:
+                result = LogResult(ip, model, classify_device_error(e), 0, job.transferred,
+                                   message=str(e) or type(e).__name__)
+        result.elapsed = time.perf_counter() - begin
+        return result
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {executor.submit(run_one, ip, model) for ip, model in targets}
+        while pending:
+            done = {future for future in pending if future.done()}
+            for future in done:
+                result = future.result()
+                jobs.pop(result.ip, None)
+                results.append(result)
+                if result_callback:
+                    result_callback(result)
+            pending -= done
+            if progress_callback:
+                for ip, job in list(jobs.items()):
+                    progress_callback(ip, job.transferred)
+            if pending:
+                wait_futures(pending, LOG_PROGRESS_INTERVAL, FIRST_COMPLETED)
+
+    manifest_path = os.path.join(local_path, "logs", f"manifest_{started.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    manifest = {
+        "started": started.strftime("%Y-%m-%d %H:%M:%S"),
+        "finished": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "devices": [{
+            "ip": result.ip,
+            "model": result.model,
+            "status": result.status,
+            "archive": os.path.basename(result.archive) if result.archive else None,
+            "size": os.path.getsize(result.archive) if result.archive else 0,
+            "files": result.files,
+            "transferred": result.transferred,
+            "elapsed": round(result.elapsed, 2),
+            "message": result.message,
+        } for result in sorted(results, key=lambda result: ipaddress.ip_address(result.ip))],
+    }
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    print(f"日志获取完成，清单: {manifest_path}")
+    return manifest_path, results
+
+
 def zip_files(source_file_path, zip_file_path):
     try:
         with zipfile.ZipFile(zip_file_path, 'w') as zip_file:
@@ -655,7 +3526,7 @@ def get_test_tools_last_version():
 
     for url in urls:
         try:
-            response = requests.get(url, timeout=10)
+            response = get_http_session().get(url, timeout=10)
             if response.status_code == 200:
                 return response.json()
         except Exception as e: